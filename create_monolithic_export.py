@@ -4,17 +4,46 @@
 Запуск: python create_monolithic_export.py [путь_к_проекту]
 """
 
+import codecs
+import functools
 import os
+import re
+import shutil
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from project_utils.walker import FileFilter, iter_project_files
+
 class MonolithicProjectExporter:
-    def __init__(self, project_root="."):
+    # Размер буфера выходного файла (4 МБ)
+    OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+    # Параллельное чтение: число потоков, сколько файлов читаем наперёд
+    # и максимальный размер файла, который читаем в память (1 МБ)
+    READ_WORKERS = 8
+    PREFETCH_LIMIT = 16
+    PREFETCH_MAX_SIZE = 1024 * 1024
+    # Сколько байт из начала файла проверяем на бинарность
+    BINARY_SNIFF_SIZE = 512
+    # Размер блока при проверке кодировки крупного файла
+    DECODE_CHUNK_SIZE = 1024 * 1024
+    # Маркер бинарного файла в результате read_file
+    BINARY_FILE = object()
+    FILE_SEPARATOR = "=" * 80
+    
+    # Как часто выводить прогресс, если подробный вывод выключен
+    PROGRESS_EVERY = 100
+    
+    def __init__(self, project_root=".", verbose=False):
         self.project_root = Path(project_root).resolve()
+        # verbose=True - печатать каждый добавленный файл
+        self.verbose = verbose
         self.output_file = None
         self.file_count = 0
         self.total_size = 0
+        self._export_time_str = None
         
         # Папки для исключения (рекурсивно)
         self.exclude_dirs = {
@@ -39,100 +68,173 @@ class MonolithicProjectExporter:
             '.html', '.css', '.js', '.ts', '.sql', '.csv'
         }
         
-    def should_include(self, path: Path) -> bool:
-        """Определяем, нужно ли включать файл"""
-        # Проверяем папки
-        if path.is_dir():
-            return path.name not in self.exclude_dirs and not any(
-                path.match(pattern) for pattern in self.exclude_dirs if '*' in pattern
-            )
+        # Файлы без расширения, которые включаем по имени
+        self.include_names = {'.env', '.gitignore', 'Dockerfile', 'docker-compose.yml'}
         
-        # Проверяем файлы
-        if any(path.match(pattern) for pattern in self.exclude_files):
-            return False
-            
-        # Проверяем расширения (если есть расширение)
-        if path.suffix:
-            return path.suffix in self.include_extensions
+        # Общий фильтр и обход дерева (см. project_utils/walker.py)
+        self._filter = FileFilter(
+            exclude_dirs=self.exclude_dirs,
+            exclude_files=self.exclude_files,
+            include_extensions=self.include_extensions,
+            include_names=self.include_names
+        )
+        self._walk = functools.partial(iter_project_files, file_filter=self._filter)
         
-        # Файлы без расширения проверяем по имени
-        if path.name in ['.env', '.gitignore', 'Dockerfile', 'docker-compose.yml']:
-            return True
-            
-        return False
-    
-    def sanitize_content(self, content: str, file_path: Path) -> str:
-        """Очищаем чувствительные данные"""
-        relative_path = str(file_path.relative_to(self.project_root))
+        # Строки .env с секретами: ключ до первого '=' сохраняем, значение скрываем
+        self._secret_re = re.compile(
+            r'^[^\S\n]*(?=[^\n]*(?:TOKEN=|KEY=|SECRET=|PASSWORD=|API_))'
+            r'([^=\n]*?)[^\S\n]*=[^\n]*$',
+            re.IGNORECASE | re.MULTILINE
+        )
         
-        if file_path.name == '.env':
-            lines = content.split('\n')
-            cleaned_lines = []
-            for line in lines:
-                if any(keyword in line.upper() for keyword in 
-                       ['TOKEN=', 'KEY=', 'SECRET=', 'PASSWORD=', 'API_']):
-                    if '=' in line:
-                        key = line.split('=')[0].strip()
-                        cleaned_lines.append(f"{key}=[SECRET_REMOVED]")
-                    else:
-                        cleaned_lines.append(line)
-                else:
-                    cleaned_lines.append(line)
-            return '\n'.join(cleaned_lines)
+    def sanitize_content(self, content: str, filename: str) -> str:
+        """Очищаем чувствительные данные"""
+        if filename == '.env':
+            return self._secret_re.sub(r'\1=[SECRET_REMOVED]', content)
         
         return content
     
+    def _write_text(self, text: str):
+        """Пишем строку в выходной файл (открыт в бинарном режиме)"""
+        self.output_file.write(text.encode('utf-8'))
+    
+    def _copy_file_contents(self, src, size: int):
+        """
+        Копируем содержимое файла в выходной файл без загрузки в память.
+        Используем os.sendfile, если он доступен, иначе shutil.copyfileobj.
+        """
+        if hasattr(os, 'sendfile'):
+            # sendfile пишет прямо в дескриптор, минуя буфер Python
+            self.output_file.flush()
+            out_fd = self.output_file.fileno()
+            in_fd = src.fileno()
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return offset
+            except OSError:
+                # Например, ФС не поддерживает sendfile - докопируем обычным способом
+                src.seek(offset)
+        
+        shutil.copyfileobj(src, self.output_file, length=1 << 20)
+        return size
+    
     def write_file_header(self, file_path: Path, relative_path: str):
         """Записываем заголовок файла"""
-        separator = "=" * 80
-        self.output_file.write(f"\n\n{separator}\n")
-        self.output_file.write(f"ФАЙЛ: {relative_path}\n")
-        self.output_file.write(f"ПОЛНЫЙ ПУТЬ: {file_path}\n")
-        self.output_file.write(f"{separator}\n\n")
+        # Собираем заголовок целиком и пишем одним вызовом
+        self._write_text(
+            f"\n\n{self.FILE_SEPARATOR}\n"
+            f"ФАЙЛ: {relative_path}\n"
+            f"ПОЛНЫЙ ПУТЬ: {file_path}\n"
+            f"{self.FILE_SEPARATOR}\n\n"
+        )
+    
+    @staticmethod
+    def _latin1_to_utf8(data: bytes) -> bytes:
+        """Файл не в UTF-8: читаем как latin-1 и перекодируем, чтобы экспорт остался валидным UTF-8"""
+        return ("# Файл в кодировке latin-1\n" + data.decode('latin-1')).encode('utf-8')
+    
+    def _is_utf8_stream(self, f, head: bytes) -> bool:
+        """Проверяет, что остаток файла f (вместе с уже прочитанным head) - валидный UTF-8"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            decoder.decode(head)
+            while True:
+                chunk = f.read(self.DECODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                decoder.decode(chunk)
+            # Обрезанный в конце файла многобайтовый символ - тоже ошибка
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return False
+        return True
+    
+    def read_file(self, file_path: Path):
+        """
+        Читаем файл для экспорта (выполняется в пуле потоков).
+        Возвращает содержимое в байтах (UTF-8), None - если файл крупный
+        и его нужно копировать потоком, или BINARY_FILE для бинарных файлов.
+        """
+        with open(file_path, 'rb') as f:
+            # Бинарный файл распознаём по нулевому байту в начале,
+            # не читая его целиком
+            head = f.read(self.BINARY_SNIFF_SIZE)
+            if b'\x00' in head:
+                return self.BINARY_FILE
+            
+            # .env нужно очистить от секретов, поэтому читаем его целиком
+            if file_path.name == '.env':
+                content = (head + f.read()).decode('utf-8', errors='replace')
+                return self.sanitize_content(content, file_path.name).encode('utf-8')
+            
+            if os.fstat(f.fileno()).st_size > self.PREFETCH_MAX_SIZE:
+                # Крупный файл целиком проверяем на UTF-8 блоками, не держа его в памяти;
+                # копировать через sendfile можно только полностью проверенный файл
+                if self._is_utf8_stream(f, head):
+                    return None
+                f.seek(0)
+                return self._latin1_to_utf8(f.read())
+            
+            data = head + f.read()
+            try:
+                data.decode('utf-8')
+            except UnicodeDecodeError:
+                return self._latin1_to_utf8(data)
+            return data
     
-    def process_file(self, file_path: Path):
-        """Обрабатываем один файл"""
+    def process_file(self, file_path: Path, pending_read=None):
+        """Обрабатываем один файл (pending_read - future с результатом read_file)"""
         try:
             relative_path = str(file_path.relative_to(self.project_root))
             
             # Пишем заголовок
             self.write_file_header(file_path, relative_path)
             
-            # Читаем и обрабатываем содержимое
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Очищаем чувствительные данные
-                content = self.sanitize_content(content, file_path)
-                
-                # Записываем содержимое
-                self.output_file.write(content)
-                
-                # Обновляем статистику
-                self.file_count += 1
-                self.total_size += len(content)
-                
-                print(f"✅ Добавлен: {relative_path} ({len(content)} байт)")
-                
-            except UnicodeDecodeError:
-                # Пробуем другие кодировки
-                try:
-                    with open(file_path, 'r', encoding='latin-1') as f:
-                        content = f.read()
-                    self.output_file.write(f"# Файл в кодировке latin-1\n{content}")
-                    self.file_count += 1
-                except:
-                    self.output_file.write(f"# Не удалось прочитать файл как текст (бинарный файл)\n")
-                    self.output_file.write(f"# Размер: {file_path.stat().st_size} байт\n")
+            if pending_read is not None:
+                data = pending_read.result()
+            else:
+                data = self.read_file(file_path)
+            
+            if data is self.BINARY_FILE:
+                self._write_text(
+                    "# Не удалось прочитать файл как текст (бинарный файл)\n"
+                    f"# Размер: {file_path.stat().st_size} байт\n"
+                )
+                return
+            
+            if data is None:
+                # Крупные файлы копируем потоком, не загружая в память
+                with open(file_path, 'rb') as src:
+                    size = self._copy_file_contents(src, os.fstat(src.fileno()).st_size)
+            else:
+                self.output_file.write(data)
+                size = len(data)
+            
+            # Обновляем статистику
+            self.file_count += 1
+            self.total_size += size
+            
+            if self.verbose:
+                print(f"✅ Добавлен: {relative_path} ({size} байт)")
+            elif self.file_count % self.PROGRESS_EVERY == 0 and sys.stderr.isatty():
+                sys.stderr.write(f"\r📄 Обработано файлов: {self.file_count}...")
                     
         except Exception as e:
             print(f"⚠️  Ошибка обработки {file_path}: {e}")
     
     def export_project(self, output_filename=None):
         """Основная функция экспорта"""
+        # Фиксируем время экспорта один раз для имени файла, заголовка и статистики
+        export_started = datetime.now()
+        self._export_time_str = export_started.strftime('%Y-%m-%d %H:%M:%S')
+        
         if not output_filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = export_started.strftime('%Y%m%d_%H%M%S')
             output_filename = self.project_root / f"PROJECT_FULL_EXPORT_{timestamp}.txt"
         
         print(f"\n🚀 Начинаем монолитный экспорт проекта")
@@ -141,27 +243,23 @@ class MonolithicProjectExporter:
         print("=" * 60)
         
         try:
-            self.output_file = open(output_filename, 'w', encoding='utf-8')
+            self.output_file = open(output_filename, 'wb', buffering=self.OUTPUT_BUFFER_SIZE)
             
             # Записываем заголовок экспорта
             self.write_export_header()
             
-            # Рекурсивно обходим все файлы
-            for root, dirs, files in os.walk(self.project_root):
-                # Преобразуем root в Path
-                root_path = Path(root)
-                
-                # Фильтруем папки
-                dirs[:] = [d for d in dirs if self.should_include(root_path / d)]
+            # Рекурсивно обходим все файлы: пул читает следующие файлы,
+            # пока основной поток пишет текущий в исходном порядке
+            with ThreadPoolExecutor(max_workers=self.READ_WORKERS) as executor:
+                pending = deque()
+                for file_path in self._walk(self.project_root):
+                    file_path = Path(file_path)
+                    pending.append((file_path, executor.submit(self.read_file, file_path)))
+                    if len(pending) >= self.PREFETCH_LIMIT:
+                        self.process_file(*pending.popleft())
                 
-                # Сортируем для консистентности
-                dirs.sort()
-                files.sort()
-                
-                for file in files:
-                    file_path = root_path / file
-                    if self.should_include(file_path):
-                        self.process_file(file_path)
+                while pending:
+                    self.process_file(*pending.popleft())
             
             # Записываем статистику
             self.write_statistics()
@@ -169,6 +267,9 @@ class MonolithicProjectExporter:
             # Закрываем файл
             self.output_file.close()
             
+            if not self.verbose and self.file_count >= self.PROGRESS_EVERY and sys.stderr.isatty():
+                sys.stderr.write("\n")
+            
             print("\n" + "=" * 60)
             print(f"🎉 ЭКСПОРТ ЗАВЕРШЁН!")
             print(f"📊 Файлов экспортировано: {self.file_count}")
@@ -188,36 +289,36 @@ class MonolithicProjectExporter:
     def write_export_header(self):
         """Записываем заголовок экспорта"""
         header = f"""
-{'=' * 80}
+{self.FILE_SEPARATOR}
 МОНОЛИТНЫЙ ЭКСПОРТ ПРОЕКТА: {self.project_root.name}
-{'=' * 80}
+{self.FILE_SEPARATOR}
 
-📅 Дата экспорта: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+📅 Дата экспорта: {self._export_time_str}
 📁 Корневая папка: {self.project_root}
 👤 Экспортёр: MonolithicProjectExporter v1.0
 
-{'=' * 80}
+{self.FILE_SEPARATOR}
 ПРИМЕЧАНИЯ:
 1. Файлы разделены заголовками с '======'
 2. Чувствительные данные (токены, ключи) заменены на [SECRET_REMOVED]
 3. Бинарные файлы пропущены, только их метаданные
 4. Все пути указаны относительно корня проекта
-{'=' * 80}
+{self.FILE_SEPARATOR}
 
 """
-        self.output_file.write(header)
+        self._write_text(header)
     
     def write_statistics(self):
         """Записываем статистику в конец файла"""
         stats = f"""
 
-{'=' * 80}
+{self.FILE_SEPARATOR}
 📊 СТАТИСТИКА ЭКСПОРТА
-{'=' * 80}
+{self.FILE_SEPARATOR}
 Всего файлов: {self.file_count}
 Общий размер кода: {self.total_size} байт ({self.total_size / 1024:.1f} КБ)
-Дата экспорта: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-{'=' * 80}
+Дата экспорта: {self._export_time_str}
+{self.FILE_SEPARATOR}
 
 🎯 ИНСТРУКЦИЯ ДЛЯ АНАЛИЗА:
 1. Ищите конкретные файлы по строке "ФАЙЛ: "
@@ -225,11 +326,11 @@ class MonolithicProjectExporter:
 3. Для навигации используйте поиск по имени файла
 4. .env файлы очищены от секретов
 
-{'=' * 80}
+{self.FILE_SEPARATOR}
 КОНЕЦ ЭКСПОРТА
-{'=' * 80}
+{self.FILE_SEPARATOR}
 """
-        self.output_file.write(stats)
+        self._write_text(stats)
 
 
 def main():
@@ -12,17 +12,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from utils.logger import log
 from data_feed.moex_client import MOEXClient
 
+# Бумаги, по которым при запуске проверяется доступность MOEX API
+WATCHLIST = ["SBER", "GAZP", "LKOH"]
+
 def main():
     """Основная функция"""
     log.info("🚀 Запускаем trading бот...")
     
-    # Тестируем компоненты
-    client = MOEXClient()
-    
-    # Получаем данные по SBER
-    sber_info = client.get_security_info("SBER")
-    if sber_info:
-        log.info("✅ MOEX API работает")
+    # Тестируем компоненты (клиент закрывает свои соединения и event loop при выходе)
+    with MOEXClient() as client:
+        # Получаем данные по основным бумагам одним пакетом параллельных запросов
+        securities = client.get_many_security_info(WATCHLIST)
+        available = [ticker for ticker, info in securities.items() if info]
+        if available:
+            log.info("✅ MOEX API работает: получены данные по {}", ", ".join(available))
     
     log.info("🎯 Trading бот готов к работе!")
 
@@ -1,92 +1,102 @@
 #!/usr/bin/env python3
 """
-Скрипт для выгрузки текущего состояния проекта в один файл
+Скрипт для выгрузки текущего состояния проекта в один файл (NDJSON)
 Запуск: python project_utils/export_project.py
 """
 
 import os
-import json
+import sys
+import ujson
 import base64
+import functools
 from datetime import datetime
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта project_utils
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from project_utils.walker import FileFilter, iter_project_files
 
 def export_project():
-    """Экспортирует весь проект в один JSON файл"""
+    """Экспортирует весь проект в один NDJSON файл (одна запись на строку)"""
     print("📤 Выгружаем текущее состояние проекта...")
     
-    project_data = {
-        "export_date": datetime.now().isoformat(),
-        "project_name": "Python Trading Bot",
-        "files": {}
-    }
+    output_filename = f"project_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
     
     # Исключаемые папки и файлы
     exclude_dirs = {'.git', '__pycache__', 'trading_env', 'data', 'logs'}
-    exclude_files = {'.DS_Store'}
+    exclude_files = {'.DS_Store', output_filename}
+    walk_project = functools.partial(
+        iter_project_files,
+        file_filter=FileFilter(exclude_dirs=exclude_dirs, exclude_files=exclude_files)
+    )
     
-    # Собираем все файлы проекта
-    for root, dirs, files in os.walk("."):
-        # Исключаем системные папки
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        for file in files:
-            if file in exclude_files:
-                continue
-                
-            file_path = os.path.join(root, file)
-            relative_path = file_path[2:]  # убираем ./
+    # Краткий список файлов для итоговой сводки (без содержимого)
+    manifest = []
+    
+    try:
+        with open(output_filename, 'w', encoding='utf-8') as out:
+            # Первая строка - метаданные экспорта
+            out.write(ujson.dumps({
+                "export_date": datetime.now().isoformat(),
+                "project_name": "Python Trading Bot"
+            }, ensure_ascii=False) + "\n")
             
-            # Пропускаем сам скрипт экспорта
-            if "project_utils/export_project.py" in relative_path:
-                continue
+            # Собираем все файлы проекта, записывая каждый сразу после чтения
+            for file_path in walk_project("."):
+                file = os.path.basename(file_path)
+                relative_path = file_path[2:]  # убираем ./
                 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                # Пропускаем сам скрипт экспорта
+                if "project_utils/export_project.py" in relative_path:
+                    continue
+                    
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    
+                    # Для .env файла заменяем токен на placeholder
+                    if file == '.env':
+                        lines = content.split('\n')
+                        new_lines = []
+                        for line in lines:
+                            if line.startswith('INVEST_TOKEN='):
+                                new_lines.append('INVEST_TOKEN=Введите ваш токен')
+                            else:
+                                new_lines.append(line)
+                        content = '\n'.join(new_lines)
+                    
+                    record = {
+                        "path": relative_path,
+                        "content": content,
+                        "size": len(content),
+                        "encoding": "utf-8"
+                    }
+                    
+                    print(f"✅ Добавлен: {relative_path}")
+                    
+                except Exception as e:
+                    print(f"⚠️  Ошибка чтения {relative_path}: {e}")
+                    record = {
+                        "path": relative_path,
+                        "content": f"# Ошибка чтения файла: {e}",
+                        "size": 0,
+                        "error": str(e)
+                    }
                 
-                # Для .env файла заменяем токен на placeholder
-                if file == '.env':
-                    lines = content.split('\n')
-                    new_lines = []
-                    for line in lines:
-                        if line.startswith('INVEST_TOKEN='):
-                            new_lines.append('INVEST_TOKEN=Введите ваш токен')
-                        else:
-                            new_lines.append(line)
-                    content = '\n'.join(new_lines)
-                
-                project_data["files"][relative_path] = {
-                    "content": content,
-                    "size": len(content),
-                    "encoding": "utf-8"
-                }
-                
-                print(f"✅ Добавлен: {relative_path}")
-                
-            except Exception as e:
-                print(f"⚠️  Ошибка чтения {relative_path}: {e}")
-                project_data["files"][relative_path] = {
-                    "content": f"# Ошибка чтения файла: {e}",
-                    "size": 0,
-                    "error": str(e)
-                }
-    
-    # Сохраняем в файл
-    output_filename = f"project_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    
-    try:
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, indent=2, ensure_ascii=False)
+                out.write(ujson.dumps(record, ensure_ascii=False) + "\n")
+                manifest.append((relative_path, record["size"]))
         
         file_size = os.path.getsize(output_filename) / 1024 / 1024
         print(f"\n🎉 Проект экспортирован в: {output_filename}")
         print(f"📊 Размер файла: {file_size:.2f} MB")
-        print(f"📁 Файлов в экспорте: {len(project_data['files'])}")
+        print(f"📁 Файлов в экспорте: {len(manifest)}")
         print("\n📋 Содержимое проекта:")
         
         # Выводим структуру
-        for file_path in sorted(project_data["files"].keys()):
-            file_info = project_data["files"][file_path]
-            print(f"  - {file_path} ({file_info['size']} байт)")
+        for file_path, size in sorted(manifest):
+            print(f"  - {file_path} ({size} байт)")
             
         return True
         
@@ -98,7 +108,7 @@ def main():
     """Основная функция"""
     print("🚀 Trading Bot Project Exporter")
     print("=" * 50)
-    print("Экспортирует текущее состояние проекта в один JSON файл")
+    print("Экспортирует текущее состояние проекта в один NDJSON файл")
     print("Токен API заменяется на 'Введите ваш токен'")
     print("=" * 50)
     
@@ -106,7 +116,7 @@ def main():
     
     if success:
         print("\n✅ Экспорт завершен!")
-        print("💡 Передайте JSON файл для анализа структуры проекта")
+        print("💡 Передайте NDJSON файл для анализа структуры проекта")
     else:
         print("\n❌ Ошибка при экспорте проекта")
 
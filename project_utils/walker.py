@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Общий обход дерева проекта для скриптов экспорта
+(create_monolithic_export.py и project_utils/export_project.py)
+"""
+
+import fnmatch
+import os
+import re
+
+
+def compile_patterns(patterns) -> re.Pattern:
+    """Собирает glob-шаблоны в одно регулярное выражение"""
+    if not patterns:
+        # Пустой набор не должен совпадать ни с чем
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(fnmatch.translate(p) for p in sorted(patterns)))
+
+
+class FileFilter:
+    """Фильтр файлов и папок по имени (без обращений к файловой системе)"""
+    
+    def __init__(self, exclude_dirs=(), exclude_files=(), include_extensions=None, include_names=()):
+        """
+        Args:
+            exclude_dirs: Имена или glob-шаблоны исключаемых папок
+            exclude_files: Имена или glob-шаблоны исключаемых файлов
+            include_extensions: Допустимые расширения (None - любые файлы)
+            include_names: Файлы без расширения, которые включаем по имени
+        """
+        # Компилируем исключения один раз: точные имена и шаблоны
+        # объединяются в одно регулярное выражение
+        self._exclude_dir_re = compile_patterns(exclude_dirs)
+        self._exclude_file_re = compile_patterns(exclude_files)
+        self._include_extensions = None if include_extensions is None else frozenset(include_extensions)
+        self._include_names = frozenset(include_names)
+    
+    def include_dir(self, name: str) -> bool:
+        """Проверяем папку по имени"""
+        return self._exclude_dir_re.match(name) is None
+    
+    def include_file(self, name: str) -> bool:
+        """Проверяем файл по имени"""
+        if self._exclude_file_re.match(name) is not None:
+            return False
+        if self._include_extensions is None:
+            return True
+            
+        # Проверяем расширения (если есть расширение); точка в начале
+        # имени (.env, .gitignore) расширением не считается
+        dot = name.rfind('.')
+        if dot > 0:
+            return name[dot:] in self._include_extensions
+        
+        # Файлы без расширения проверяем по имени
+        return name in self._include_names
+
+
+def iter_project_files(root, file_filter: FileFilter):
+    """
+    Обходит дерево через os.scandir и отдаёт пути подходящих файлов.
+    Порядок совпадает с os.walk: сначала файлы папки, затем подпапки,
+    всё отсортировано по имени.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if file_filter.include_dir(entry.name):
+                    subdirs.append(entry.path)
+            elif entry.is_file() and file_filter.include_file(entry.name):
+                yield entry.path
+        
+        # Кладём в стек в обратном порядке, чтобы обходить по алфавиту
+        stack.extend(reversed(subdirs))
@@ -4,6 +4,8 @@
 """
 
 import sys
+from importlib import metadata
+from importlib.util import find_spec
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent
@@ -27,39 +29,39 @@ critical_libs = [
 print("📦 КРИТИЧЕСКИ ВАЖНЫЕ БИБЛИОТЕКИ:")
 print("-" * 40)
 
+def is_installed(import_name: str) -> bool:
+    """Проверяет наличие модуля без его импорта (find_spec не исполняет код модуля)"""
+    try:
+        return find_spec(import_name) is not None
+    except ModuleNotFoundError:
+        # Для вложенных модулей (tinkoff.invest) отсутствует родительский пакет
+        return False
+
 all_success = True
 for import_name, description, pkg_name in critical_libs:
-    try:
-        # Для tinkoff.invest требуется особый подход к импорту
-        if import_name == "tinkoff.invest":
-            from tinkoff.invest import Client
-            print(f"✅ {import_name:25} - {description}")
-        else:
-            __import__(import_name.replace(".", "_"))
-            print(f"✅ {import_name:25} - {description}")
-    except ImportError as e:
+    if is_installed(import_name):
+        print(f"✅ {import_name:25} - {description}")
+    else:
         print(f"❌ {import_name:25} - НЕ НАЙДЕН. Установите: pip install {pkg_name}")
-        all_critical_success = False
+        all_success = False
 
 print("\n📊 ВЕРСИИ УСТАНОВЛЕННЫХ БИБЛИОТЕК:")
 print("-" * 40)
 
-try:
-    import pandas as pd
-    import numpy as np
-    import telegram
-    import grpc
-    import aiohttp
-    from tinkoff.invest import __version__ as tinkoff_version
-
-    print(f"Pandas: {pd.__version__}")
-    print(f"Numpy: {np.__version__}")
-    print(f"Python Telegram Bot: {telegram.__version__}")
-    print(f"gRPC (grpcio): {grpc.__version__}")
-    print(f"AIOHTTP: {aiohttp.__version__}")
-    print(f"Tinkoff Investments: {tinkoff_version}")
-except ImportError as e:
-    print(f"⚠️ Не удалось проверить некоторые версии: {e}")
+# Версии берём из метаданных дистрибутивов, не импортируя сами библиотеки
+versions = [
+    ("Pandas", "pandas"),
+    ("Numpy", "numpy"),
+    ("Python Telegram Bot", "python-telegram-bot"),
+    ("gRPC (grpcio)", "grpcio"),
+    ("AIOHTTP", "aiohttp"),
+    ("Tinkoff Investments", "tinkoff-investments"),
+]
+for title, pkg_name in versions:
+    try:
+        print(f"{title}: {metadata.version(pkg_name)}")
+    except metadata.PackageNotFoundError:
+        print(f"⚠️ Не удалось проверить версию {title}: пакет {pkg_name} не установлен")
 
 print("\n" + "=" * 50)
 
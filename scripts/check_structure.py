@@ -11,9 +11,31 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+def scan_existing_paths(paths):
+    """
+    Собирает множество существующих путей из списка.
+    Каждая родительская папка читается одним os.scandir вместо
+    отдельного os.path.exists на каждый путь.
+    """
+    existing = set()
+    parents = {os.path.dirname(path) for path in paths}
+    for parent in parents:
+        try:
+            with os.scandir(parent or '.') as entries:
+                for entry in entries:
+                    existing.add(f"{parent}/{entry.name}" if parent else entry.name)
+        except OSError:
+            # Родительской папки нет - все пути внутри неё отсутствуют
+            continue
+    return existing
+
 def check_structure():
-    print("🔍 Проверяем структуру проекта торгового бота...")
-    print("=" * 50)
+    # Весь отчёт собираем в список и выводим одной записью в stdout
+    lines = []
+    out = lines.append
+    
+    out("🔍 Проверяем структуру проекта торгового бота...")
+    out("=" * 50)
     
     # Актуальная структура проекта
     expected_dirs = [
@@ -68,64 +90,74 @@ def check_structure():
         'test_bot_monitoring.sh',
         'test_stop_messages.sh',
         'scripts/tinkoff_grpc_client_fixed.py',
-        'project_utils/export_project.py'
+        'project_utils/export_project.py',
+        'project_utils/walker.py',
+        'src/utils/http.py',
+        'src/utils/quotations.py',
+        'src/utils/grpc_channel.py',
+        'src/utils/candles.py'
     ]
     
     missing_dirs = []
     missing_critical_files = []
     missing_optional_files = []
     
+    existing = scan_existing_paths(expected_dirs + critical_files + optional_files)
+    
     # Проверяем папки
-    print("\n📁 Проверка папок:")
+    out("\n📁 Проверка папок:")
     for dir_path in expected_dirs:
-        if not os.path.exists(dir_path):
+        if dir_path not in existing:
             missing_dirs.append(dir_path)
-            print(f"   ❌ {dir_path}")
+            out(f"   ❌ {dir_path}")
         else:
-            print(f"   ✅ {dir_path}")
+            out(f"   ✅ {dir_path}")
     
     # Проверяем критические файлы
-    print("\n📄 Критические файлы:")
+    out("\n📄 Критические файлы:")
     for file_path in critical_files:
-        if not os.path.exists(file_path):
+        if file_path not in existing:
             missing_critical_files.append(file_path)
-            print(f"   ❌ {file_path}")
+            out(f"   ❌ {file_path}")
         else:
-            print(f"   ✅ {file_path}")
+            out(f"   ✅ {file_path}")
     
     # Проверяем дополнительные файлы
-    print("\n📄 Дополнительные файлы:")
+    out("\n📄 Дополнительные файлы:")
     for file_path in optional_files:
-        if not os.path.exists(file_path):
+        if file_path not in existing:
             missing_optional_files.append(file_path)
-            print(f"   ⚠️  {file_path} (отсутствует)")
+            out(f"   ⚠️  {file_path} (отсутствует)")
         else:
-            print(f"   ✅ {file_path}")
+            out(f"   ✅ {file_path}")
     
     # Выводим итог
-    print("\n" + "=" * 50)
-    print("📊 ИТОГ ПРОВЕРКИ:")
+    out("\n" + "=" * 50)
+    out("📊 ИТОГ ПРОВЕРКИ:")
     
     if not missing_dirs and not missing_critical_files:
-        print("✅ Структура проекта В ПОРЯДКЕ!")
+        out("✅ Структура проекта В ПОРЯДКЕ!")
         if missing_optional_files:
-            print(f"   ⚠️  Отсутствует {len(missing_optional_files)} дополнительных файлов")
+            out(f"   ⚠️  Отсутствует {len(missing_optional_files)} дополнительных файлов")
     else:
         if missing_dirs:
-            print(f"❌ Отсутствуют папки ({len(missing_dirs)}):")
+            out(f"❌ Отсутствуют папки ({len(missing_dirs)}):")
             for dir_path in missing_dirs:
-                print(f"   - {dir_path}")
+                out(f"   - {dir_path}")
         
         if missing_critical_files:
-            print(f"❌ Отсутствуют критические файлы ({len(missing_critical_files)}):")
+            out(f"❌ Отсутствуют критические файлы ({len(missing_critical_files)}):")
             for file_path in missing_critical_files:
-                print(f"   - {file_path}")
+                out(f"   - {file_path}")
         
-        print("\n🛠 Рекомендации:")
+        out("\n🛠 Рекомендации:")
         if '.env' in missing_critical_files:
-            print("   - Создайте файл .env из .env.example")
+            out("   - Создайте файл .env из .env.example")
         if 'requirements.txt' in missing_critical_files:
-            print("   - Создайте requirements.txt с зависимостями")
+            out("   - Создайте requirements.txt с зависимостями")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     check_structure()
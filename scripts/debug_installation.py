@@ -4,6 +4,8 @@
 """
 
 import sys
+from importlib import metadata
+from importlib.util import find_spec
 from pathlib import Path
 
 # Обновляем путь для импорта после перемещения в scripts/
@@ -14,15 +16,17 @@ print("🔧 Отладка установки Python:")
 print(f"Python путь: {sys.executable}")
 print(f"Версия Python: {sys.version}")
 
-try:
-    import pip
-    installed_packages = [p.key for p in pip.get_installed_distributions()]
-    print("Установленные пакеты содержащие 'tinkoff':", 
-          [p for p in installed_packages if 'tinkoff' in p])
-except:
-    pass
+# Ищем установленные дистрибутивы, связанные с Tinkoff
+names = [(dist.metadata["Name"] or "").lower() for dist in metadata.distributions()]
+found = [name for name in names if "tinkoff" in name or "invest" in name]
+print("Установленные пакеты содержащие 'tinkoff'/'invest':", sorted(found))
 
-# Проверим доступные модули
-import pkgutil
-all_modules = [name for importer, name, ispkg in pkgutil.iter_modules()]
-print("Доступные модули:", [m for m in all_modules if 'tinkoff' in m or 'invest' in m])
+# Модули верхнего уровня, которые предоставляют эти пакеты (готовый индекс, без обхода sys.path)
+modules = sorted(
+    module for module, dists in metadata.packages_distributions().items()
+    if any(dist.lower() in found for dist in dists)
+)
+print("Модули из этих пакетов:", modules)
+
+# Проверяем, что модуль tinkoff доступен для импорта
+print("Модуль tinkoff доступен:", find_spec("tinkoff") is not None)
@@ -3,196 +3,476 @@
 Tinkoff gRPC клиент для получения стакана - ИСПРАВЛЕННАЯ ВЕРСИЯ (синхронизирована с ботом)
 """
 
+import itertools
+import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import SimpleNamespace
+import ujson
 from dotenv import load_dotenv
 
 load_dotenv()
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from utils.grpc_channel import CHANNEL_OPTIONS, subscribe_order_books
 from utils.logger import log
+from utils.orderbook_snapshot import OrderbookSnapshot
+from utils.quotations import levels_to_arrays, quotation_to_float
 
-try:
-    from tinkoff.invest import Client
-    log.info("✅ Tinkoff библиотеки импортированы")
-except ImportError as e:
-    log.error(f"❌ Ошибка импорта: {e}")
-    sys.exit(1)
+# Разделители при выводе стакана
+SEPARATOR = "=" * 60
+THIN_SEPARATOR = "-" * 30
+
+# FIGI популярных тикеров: для них стакан запрашивается сразу, без поиска инструмента.
+# Список статический и может устареть (делистинг, смена FIGI) - его нужно обновлять вручную.
+# Используется только для запросов стакана; поиск инструмента (команда test) всегда идёт в API.
+FIGI_SEED_PATH = os.path.join(os.path.dirname(__file__), '_figi_seed.json')
+
+def load_figi_seed(path=FIGI_SEED_PATH):
+    """Загружает упрощённые инструменты (ticker, figi, name) из JSON с известными FIGI"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            seed = json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning("⚠️  Не удалось загрузить {}: {}", path, e)
+        return {}
+    return {
+        ticker: SimpleNamespace(ticker=ticker, figi=info['figi'], name=info['name'])
+        for ticker, info in seed.items()
+    }
+
+# Дисковый кэш списков инструментов для prewarm (акции, облигации, фонды)
+INSTRUMENTS_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'tinkoff', 'instruments.json')
+INSTRUMENTS_CACHE_TTL = 3600  # секунд
+
+def load_instruments_cache(path=INSTRUMENTS_CACHE_PATH, ttl=INSTRUMENTS_CACHE_TTL):
+    """Читает кэш инструментов с диска, если он свежее ttl секунд (иначе None)"""
+    try:
+        if time.time() - os.path.getmtime(path) >= ttl:
+            return None
+        with open(path, encoding='utf-8') as f:
+            records = ujson.load(f)
+    except (OSError, ValueError):
+        return None
+    return [SimpleNamespace(**record) for record in records]
+
+def save_instruments_cache(instruments, path=INSTRUMENTS_CACHE_PATH):
+    """Сохраняет на диск только нужные поля инструментов (ticker, figi, name, lot)"""
+    records = [
+        {'ticker': i.ticker, 'figi': i.figi, 'name': i.name, 'lot': i.lot}
+        for i in instruments
+    ]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            ujson.dump(records, f, ensure_ascii=False)
+    except OSError as e:
+        log.warning("⚠️  Не удалось сохранить кэш инструментов {}: {}", path, e)
+
+_client_class = None
+
+def load_client_class():
+    """
+    Импортирует клиент tinkoff.invest. Импорт тяжёлый, поэтому выполняется
+    только при открытии первого канала (--help и разбор команды работают без него);
+    класс запоминается, и следующие каналы пула его переиспользуют.
+    """
+    global _client_class
+    if _client_class is None:
+        try:
+            from tinkoff.invest import Client
+        except ImportError as e:
+            log.error("❌ Ошибка импорта: {}", e)
+            sys.exit(1)
+        log.info("✅ Tinkoff библиотеки импортированы")
+        _client_class = Client
+    return _client_class
 
 class TinkoffGrpcFastClient:
-    def __init__(self, token=None):
+    # Максимум одновременных запросов в get_orderbooks_sync
+    MAX_PARALLEL_REQUESTS = 8
+    # Сколько секунд найденный инструмент считается актуальным (делистинг, смена флагов торговли)
+    INSTRUMENT_CACHE_TTL = 3600
+
+    __slots__ = (
+        'token', 'pool_size', '_client_managers', '_pool', '_pool_lock',
+        '_next_index', '_instrument_cache', '_listed_instruments', '_figi_seed',
+    )
+
+    def __init__(self, token=None, pool_size: int = 1):
+        """
+        Args:
+            token: Токен Tinkoff API (по умолчанию из INVEST_TOKEN)
+            pool_size: Число gRPC-каналов; запросы распределяются по ним по кругу,
+                чтобы параллельные вызовы не упирались в одно HTTP/2-соединение
+        """
         self.token = token or os.getenv('INVEST_TOKEN')
         if not self.token:
             log.error("❌ Токен не найден. Укажите в .env файле")
             raise ValueError("Токен Tinkoff API не найден")
+        # Клиенты (gRPC-каналы) открываются при первом обращении и переиспользуются всеми запросами
+        self.pool_size = max(1, pool_size)
+        self._client_managers = []
+        self._pool = []
+        self._pool_lock = threading.Lock()
+        self._next_index = itertools.count()
+        # Найденные инструменты по тикеру: (время добавления, инструмент)
+        self._instrument_cache = {}
+        # Инструменты из списков prewarm (с диска - упрощённые, без флагов торговли)
+        self._listed_instruments = {}
+        # Известные FIGI популярных тикеров (упрощённые инструменты без lot и флагов торговли)
+        self._figi_seed = load_figi_seed()
         log.info("🚀 Инициализация gRPC клиента Tinkoff")
 
-    def find_instrument_by_ticker_sync(self, ticker: str):
-        """Синхронный поиск инструмента по тикеру"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def client(self):
+        """Открытый клиент Tinkoff: следующий канал пула по кругу (создаётся при первом обращении)"""
+        index = next(self._next_index) % self.pool_size
+        if index >= len(self._pool):
+            with self._pool_lock:
+                Client = load_client_class()
+                while len(self._pool) <= index:
+                    manager = Client(self.token, options=CHANNEL_OPTIONS)
+                    self._pool.append(manager.__enter__())
+                    self._client_managers.append(manager)
+        return self._pool[index]
+
+    def close(self):
+        """Закрывает все gRPC-каналы пула"""
+        with self._pool_lock:
+            for manager in self._client_managers:
+                manager.__exit__(None, None, None)
+            self._client_managers.clear()
+            self._pool.clear()
+
+    def _cached_instrument(self, ticker: str):
+        """Инструмент из кэша, если запись не старше INSTRUMENT_CACHE_TTL (иначе None)"""
+        entry = self._instrument_cache.get(ticker)
+        if entry is None:
+            return None
+        added, instrument = entry
+        if time.monotonic() - added >= self.INSTRUMENT_CACHE_TTL:
+            self._instrument_cache.pop(ticker, None)
+            return None
+        return instrument
+
+    def prewarm(self):
+        """
+        Загружает списки акций, облигаций и фондов (3 параллельных запроса вместо поиска
+        на каждый тикер). Как и известные FIGI, они используются только для запросов стакана.
+        Списки сохраняются на диск и в течение INSTRUMENTS_CACHE_TTL читаются оттуда без запросов к API.
+        """
+        cached = load_instruments_cache()
+        if cached is not None:
+            for instrument in cached:
+                self._listed_instruments.setdefault(instrument.ticker, instrument)
+            log.info("📦 Загружено {} инструментов (с диска)", len(self._listed_instruments))
+            return
+
+        from tinkoff.invest import InstrumentStatus
+
+        def fetch(kind):
+            instruments_service = self.client.instruments
+            # Только инструменты, доступные для торговли через API (фильтр на стороне сервера)
+            return getattr(instruments_service, kind)(
+                instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+            ).instruments
+
+        kinds = ("shares", "bonds", "etfs")
+        with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+            futures = [executor.submit(fetch, kind) for kind in kinds]
+
+        # Результаты разбираем в фиксированном порядке: при совпадении тикеров приоритет у акций
+        loaded = []
+        complete = True
+        for kind, future in zip(kinds, futures):
+            try:
+                instruments = future.result()
+            except Exception as e:
+                log.warning("⚠️  Не удалось загрузить {} для кэша: {}", kind, e)
+                complete = False
+                continue
+            loaded.extend(instruments)
+            for instrument in instruments:
+                self._listed_instruments.setdefault(instrument.ticker, instrument)
+        # Неполные списки на диск не пишем, чтобы не закэшировать их на весь TTL
+        if complete:
+            save_instruments_cache(loaded)
+        log.info("📦 Загружено {} инструментов", len(self._listed_instruments))
+
+    def find_instrument_by_ticker_sync(self, ticker: str, refresh: bool = False):
+        """
+        Синхронный поиск инструмента по тикеру
+        
+        Args:
+            refresh: Не брать инструмент из кэша, а всегда запрашивать find_instrument
+        """
+        cached = None if refresh else self._cached_instrument(ticker)
+        if cached is not None:
+            return cached
         try:
-            with Client(self.token) as client:
-                found_instruments = client.instruments.find_instrument(query=ticker)
-                if not found_instruments.instruments:
-                    log.error(f"❌ Инструмент с тикером '{ticker}' не найден")
-                    return None
-
-                # Берем первый инструмент с точным совпадением тикера
-                for instrument in found_instruments.instruments:
-                    if instrument.ticker == ticker:
-                        if getattr(instrument, 'api_trade_available_flag', False):
-                            log.info(f"✅ Найден подходящий инструмент: {instrument.name} ({instrument.ticker}), FIGI: {instrument.figi}")
-                        else:
-                            log.info(f"⚠️  Инструмент '{ticker}' найден, но недоступен для торговли через API.")
-                        return instrument
-
-                log.error(f"❌ Точное совпадение для тикера '{ticker}' не найдено")
+            found_instruments = self.client.instruments.find_instrument(query=ticker)
+            if not found_instruments.instruments:
+                log.error("❌ Инструмент с тикером '{}' не найден", ticker)
+                return None
+
+            # Берем первый инструмент с точным совпадением тикера
+            instrument = next(
+                (i for i in found_instruments.instruments if i.ticker == ticker),
+                None,
+            )
+            if instrument is None:
+                log.error("❌ Точное совпадение для тикера '{}' не найдено", ticker)
                 return None
 
+            if getattr(instrument, 'api_trade_available_flag', False):
+                log.info("✅ Найден подходящий инструмент: {} ({}), FIGI: {}", instrument.name, instrument.ticker, instrument.figi)
+            else:
+                log.info("⚠️  Инструмент '{}' найден, но недоступен для торговли через API.", ticker)
+            self._instrument_cache[ticker] = (time.monotonic(), instrument)
+            return instrument
+
         except Exception as e:
-            log.error(f"❌ Ошибка поиска инструмента '{ticker}': {e}")
+            log.error("❌ Ошибка поиска инструмента '{}': {}", ticker, e)
             import traceback
-            log.error(f"Подробности: {traceback.format_exc()}")
+            log.error("Подробности: {}", traceback.format_exc())
             return None
 
+    def _instrument_for_orderbook(self, ticker: str):
+        """Инструмент для запроса стакана: кэш поиска, списки prewarm, известные FIGI, затем поиск через API"""
+        instrument = (
+            self._cached_instrument(ticker)
+            or self._listed_instruments.get(ticker)
+            or self._figi_seed.get(ticker)
+        )
+        if instrument is not None:
+            return instrument
+        return self.find_instrument_by_ticker_sync(ticker)
+
     def get_orderbook_snapshot_sync(self, ticker: str, depth: int = 5):
-        log.info(f"📊 Запрашиваем стакан для '{ticker}'...")
-        instrument = self.find_instrument_by_ticker_sync(ticker)
+        log.info("📊 Запрашиваем стакан для '{}'...", ticker)
+        instrument = self._instrument_for_orderbook(ticker)
 
         if not instrument:
-            log.error(f"❌ Не удалось найти инструмент '{ticker}' для стакана")
+            log.error("❌ Не удалось найти инструмент '{}' для стакана", ticker)
             return None
 
         try:
-            start_time = datetime.now()
+            start_time = time.perf_counter_ns()
 
-            with Client(self.token) as client:
-                # Получаем ответ API (может быть GetOrderBookResponse или OrderBook)
-                response = client.market_data.get_order_book(figi=instrument.figi, depth=depth)
+            # Получаем ответ API (может быть GetOrderBookResponse или OrderBook)
+            response = self.client.market_data.get_order_book(figi=instrument.figi, depth=depth)
 
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) / 1e6
 
-            result = {
-                'ticker': ticker,
-                'instrument': instrument,
-                'response': response,  # Сохраняем весь ответ
-                'timestamp': datetime.now(),
-                'response_time_ms': response_time,
-                'source': 'gRPC (sync)'
-            }
+            result = OrderbookSnapshot(
+                ticker=ticker,
+                instrument=instrument,
+                orderbook=response,
+                timestamp=datetime.now(),
+                source='gRPC (sync)',
+                response_time_ms=response_time,
+            )
 
-            log.info(f"✅ Стакан '{ticker}' получен за {response_time:.1f} мс")
+            log.info("✅ Стакан '{}' получен за {:.1f} мс", ticker, response_time)
             return result
 
         except Exception as e:
-            log.error(f"❌ Ошибка получения стакана '{ticker}': {e}")
+            log.error("❌ Ошибка получения стакана '{}': {}", ticker, e)
             return None
 
-    def _quotation_to_float(self, quotation):
-        """Конвертирует Quotation в float"""
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
+    def stream_orderbook_sync(self, ticker: str, depth: int = 10):
+        """
+        Подписывается на стакан через MarketDataStream и отдаёт обновления
+        в виде OrderbookSnapshot, как get_orderbook_snapshot_sync (без запроса на каждый снимок).
+        Для подписки допустимы глубины 1, 10, 20, 30, 40, 50.
+        """
+        instrument = self._instrument_for_orderbook(ticker)
+        if not instrument:
+            log.error("❌ Не удалось найти инструмент '{}' для подписки", ticker)
+            return
 
-    def print_spread_and_best_prices(self, orderbook):
-        """Рассчитывает и выводит лучшие цены и спред"""
+        log.info("📡 Подписка на стакан '{}' (глубина: {})", ticker, depth)
+        orderbooks = subscribe_order_books(self.client, [instrument.figi], depth)
+        try:
+            for orderbook in orderbooks:
+                yield OrderbookSnapshot(
+                    ticker=ticker,
+                    instrument=instrument,
+                    orderbook=orderbook,
+                    timestamp=datetime.now(),
+                    source='gRPC (stream)',
+                )
+        finally:
+            # Отписка и завершение потоков gRPC
+            orderbooks.close()
+            log.info("📴 Подписка на стакан '{}' завершена", ticker)
+
+    def get_orderbooks_sync(self, tickers, depth: int = 5):
+        """Параллельно получает стаканы по нескольким тикерам (результаты в порядке tickers, None при ошибке)"""
+        if not tickers:
+            return []
+        workers = min(self.MAX_PARALLEL_REQUESTS, len(tickers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda ticker: self.get_orderbook_snapshot_sync(ticker, depth), tickers))
+
+    def _spread_lines(self, orderbook):
+        """Строки с лучшими ценами и спредом"""
+        lines = []
         try:
             best_ask = None
             best_bid = None
             
+            asks = getattr(orderbook, 'asks', None)
+            bids = getattr(orderbook, 'bids', None)
+
             # Лучшая цена продажи (первая в асках)
-            if hasattr(orderbook, 'asks') and orderbook.asks:
-                best_ask = self._quotation_to_float(orderbook.asks[0].price)
-                print(f"💎 Лучшая продажа (ask): {best_ask:.2f}")
+            if asks:
+                best_ask = quotation_to_float(asks[0].price)
+                lines.append(f"💎 Лучшая продажа (ask): {best_ask:.2f}")
             
             # Лучшая цена покупки (первая в бидах)
-            if hasattr(orderbook, 'bids') and orderbook.bids:
-                best_bid = self._quotation_to_float(orderbook.bids[0].price)
-                print(f"💎 Лучшая покупка (bid): {best_bid:.2f}")
+            if bids:
+                best_bid = quotation_to_float(bids[0].price)
+                lines.append(f"💎 Лучшая покупка (bid): {best_bid:.2f}")
             
             # Рассчитываем спред
             if best_ask is not None and best_bid is not None:
                 spread = best_ask - best_bid
-                print(f"📏 Spread: {spread:.2f}")
+                if best_bid:
+                    # Процент считаем умножением на обратную величину вместо деления
+                    inv_bid = 100.0 / best_bid
+                    lines.append(f"📏 Spread: {spread:.2f} ({spread * inv_bid:.3f}%)")
+                else:
+                    lines.append(f"📏 Spread: {spread:.2f}")
             else:
-                print("📏 Spread: недостаточно данных")
+                lines.append("📏 Spread: недостаточно данных")
                 
         except Exception as e:
-            print(f"⚠️  Ошибка расчета спреда: {e}")
+            lines.append(f"⚠️  Ошибка расчета спреда: {e}")
+        return lines
+
+    def print_spread_and_best_prices(self, orderbook):
+        """Рассчитывает и выводит лучшие цены и спред"""
+        sys.stdout.write("\n".join(self._spread_lines(orderbook)) + "\n")
 
     def print_pretty_orderbook(self, data):
         """
-        Красиво печатает стакан (с лучшими ценами и спредом)
+        Красиво печатает стакан (с лучшими ценами и спредом).
+        Кадр собирается целиком и выводится одной записью в stdout.
         """
         if not data:
             print(f"❌ Нет данных стакана")
             return
 
-        response = data['response']
-        instrument = data['instrument']
+        instrument = data.instrument
 
         # Извлекаем объект стакана из ответа (как в боте)
-        orderbook = response.orderbook if hasattr(response, 'orderbook') else response
-
-        print(f"\n{'='*60}")
-        print(f"📊 СТАКАН {data['ticker']} ({instrument.name})")
-        print(f"⏰ {data['timestamp'].strftime('%H:%M:%S')} | 📡 {data['source']}")
-        print(f"⚡ Время ответа: {data.get('response_time_ms', 0):.1f} мс")
-        print(f"{'='*60}")
+        orderbook = getattr(data.orderbook, 'orderbook', None) or data.orderbook
+        asks = getattr(orderbook, 'asks', None)
+        bids = getattr(orderbook, 'bids', None)
+
+        # Время форматируем из полей напрямую, без strftime
+        ts = data.timestamp
+        lines = [
+            "\n" + SEPARATOR,
+            f"📊 СТАКАН {data.ticker} ({instrument.name})",
+            f"⏰ {ts.hour:02d}:{ts.minute:02d}:{ts.second:02d} | 📡 {data.source}",
+            f"⚡ Время ответа: {data.response_time_ms:.1f} мс",
+            SEPARATOR,
+        ]
 
         # Аски (продажа) - сверху
-        if hasattr(orderbook, 'asks') and orderbook.asks:
-            print("💰 ПРОДАЖА (asks):")
-            for ask in orderbook.asks[:5]:
-                price = self._quotation_to_float(ask.price)
-                quantity = ask.quantity
-                print(f"  {price:10.2f} | {quantity:6} лотов")
+        if asks:
+            lines.append("💰 ПРОДАЖА (asks):")
+            prices, quantities = levels_to_arrays(asks[:5])
+            lines.extend([
+                f"  {price:10.2f} | {quantity:6} лотов"
+                for price, quantity in zip(prices.tolist(), quantities.tolist())
+            ])
         else:
-            print("💰 ПРОДАЖА: пусто")
+            lines.append("💰 ПРОДАЖА: пусто")
 
-        print(f"{'-'*30}")
+        lines.append(THIN_SEPARATOR)
 
         # Биды (покупка) - снизу
-        if hasattr(orderbook, 'bids') and orderbook.bids:
-            print("🛒 ПОКУПКА (bids):")
-            for bid in orderbook.bids[:5]:
-                price = self._quotation_to_float(bid.price)
-                quantity = bid.quantity
-                print(f"  {price:10.2f} | {quantity:6} лотов")
+        if bids:
+            lines.append("🛒 ПОКУПКА (bids):")
+            prices, quantities = levels_to_arrays(bids[:5])
+            lines.extend([
+                f"  {price:10.2f} | {quantity:6} лотов"
+                for price, quantity in zip(prices.tolist(), quantities.tolist())
+            ])
         else:
-            print("🛒 ПОКУПКА: пусто")
+            lines.append("🛒 ПОКУПКА: пусто")
 
-        print(f"{'='*60}")
-        # Выводим лучшие цены и спред
-        self.print_spread_and_best_prices(orderbook)
-        print(f"{'='*60}")
+        lines.append(SEPARATOR)
+        # Лучшие цены и спред
+        lines.extend(self._spread_lines(orderbook))
+        lines.append(SEPARATOR)
+
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 # СИНХРОННЫЕ ФУНКЦИИ ДЛЯ КОМАНДНОЙ СТРОКИ
 # ==========================================
 
-def get_orderbook_sync(ticker="SBER", depth=5):
+# Число gRPC-каналов для команды multi
+MULTI_POOL_SIZE = 4
+
+def get_orderbook_sync(client, ticker="SBER", depth=5):
     """Синхронное получение стакана"""
-    client = TinkoffGrpcFastClient()
     data = client.get_orderbook_snapshot_sync(ticker, depth)
     if data:
         client.print_pretty_orderbook(data)
     else:
         print(f"❌ Не удалось получить стакан {ticker}")
 
-def test_connection_sync(ticker="SBER"):
+def get_orderbooks_multi_sync(client, tickers, depth=5):
+    """Синхронное получение стаканов сразу по нескольким тикерам (запросы идут параллельно)"""
+    for ticker, data in zip(tickers, client.get_orderbooks_sync(tickers, depth)):
+        if data:
+            client.print_pretty_orderbook(data)
+        else:
+            print(f"❌ Не удалось получить стакан {ticker}")
+
+def stream_orderbook_sync(client, ticker="SBER", depth=10):
+    """Вывод стакана по подписке до Ctrl+C"""
+    updates = client.stream_orderbook_sync(ticker, depth)
+    try:
+        for data in updates:
+            client.print_pretty_orderbook(data)
+    except KeyboardInterrupt:
+        print("⏹️  Подписка остановлена")
+    finally:
+        # Закрываем генератор сразу: он отписывается и завершает поток запросов
+        updates.close()
+
+def test_connection_sync(client, ticker="SBER"):
     """Синхронный тест подключения"""
     print(f"🧪 Тестируем подключение к Tinkoff для тикера '{ticker}'...")
     try:
-        client = TinkoffGrpcFastClient()
-        instrument = client.find_instrument_by_ticker_sync(ticker)
+        # Всегда обращаемся к API: тест должен проверять токен и сеть, а не кэш
+        instrument = client.find_instrument_by_ticker_sync(ticker, refresh=True)
         if instrument:
             print(f"✅ Инструмент найден!")
             print(f"   Название: {instrument.name}")
             print(f"   Тикер: {instrument.ticker}")
             print(f"   FIGI: {instrument.figi}")
-            if hasattr(instrument, 'lot'):
-                print(f"   Лот: {instrument.lot}")
+            lot = getattr(instrument, 'lot', None)
+            if lot is not None:
+                print(f"   Лот: {lot}")
             return True
         else:
             print(f"❌ Инструмент '{ticker}' не найден")
@@ -204,10 +484,7 @@ def test_connection_sync(ticker="SBER"):
 # ТОЧКА ВХОДА
 # ===========
 
-def main():
-    """Основная функция"""
-    if len(sys.argv) < 2:
-        print("""
+USAGE = """
 📡 Tinkoff gRPC Client - Быстрое получение стакана
 Использование:
   python scripts/tinkoff_grpc_client_fixed.py <команда> [тикер] [глубина]
@@ -215,26 +492,59 @@ def main():
 Команды:
   test [тикер]       - Тест подключения и поиска инструмента
   get [тикер] [глуб] - Получить стакан (глубина по умолчания: 5)
+  multi <тикер> ...  - Получить стаканы по нескольким тикерам параллельно
+                       (инструменты загружаются списками и кэшируются на диске на час)
+  stream [тикер] [глуб] - Стакан по подписке MarketDataStream (глубина: 1, 10, 20, 30, 40, 50)
 
 Примеры:
   python scripts/tinkoff_grpc_client_fixed.py test SBER
   python scripts/tinkoff_grpc_client_fixed.py get DOMRF 10
-        """)
-        return
-
-    command = sys.argv[1].lower()
+  python scripts/tinkoff_grpc_client_fixed.py multi SBER GAZP LKOH
+  python scripts/tinkoff_grpc_client_fixed.py stream SBER 10
+        """
 
-    if command == "test":
-        ticker = sys.argv[2] if len(sys.argv) > 2 else "SBER"
-        test_connection_sync(ticker)
+def cmd_test(client, args):
+    ticker = args[0] if args else "SBER"
+    test_connection_sync(client, ticker)
+
+def cmd_get(client, args):
+    ticker = args[0] if args else "SBER"
+    depth = int(args[1]) if len(args) > 1 else 5
+    get_orderbook_sync(client, ticker, depth)
+
+def cmd_multi(client, args):
+    # Инструменты всех тикеров берём из списков (или их дискового кэша), а не поиском по одному
+    client.prewarm()
+    get_orderbooks_multi_sync(client, args or ["SBER"])
+
+def cmd_stream(client, args):
+    ticker = args[0] if args else "SBER"
+    depth = int(args[1]) if len(args) > 1 else 10
+    stream_orderbook_sync(client, ticker, depth)
+
+# Команда -> (обработчик, число gRPC-каналов)
+COMMANDS = {
+    "test": (cmd_test, 1),
+    "get": (cmd_get, 1),
+    "multi": (cmd_multi, MULTI_POOL_SIZE),
+    "stream": (cmd_stream, 1),
+}
 
-    elif command == "get":
-        ticker = sys.argv[2] if len(sys.argv) > 2 else "SBER"
-        depth = int(sys.argv[3]) if len(sys.argv) > 3 else 5
-        get_orderbook_sync(ticker, depth)
+def main():
+    """Основная функция"""
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(USAGE)
+        return
 
-    else:
+    command = sys.argv[1].lower()
+    if command not in COMMANDS:
         print(f"❌ Неизвестная команда: {command}")
+        return
+
+    handler, pool_size = COMMANDS[command]
+    # Один клиент (и набор gRPC-каналов) на всё время работы команды
+    with TinkoffGrpcFastClient(pool_size=pool_size) as client:
+        handler(client, sys.argv[2:])
 
 if __name__ == "__main__":
     main()
@@ -5,7 +5,6 @@
 
 import sys
 import os
-import time
 from dotenv import load_dotenv
 
 # Загружаем переменные из .env файла
@@ -17,13 +16,40 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from data_feed.tinkoff_client_simple import TinkoffAPIClientSimple
 from utils.logger import log
 
+# Глубина подписки (допустимы 1, 10, 20, 30, 40, 50) и сколько уровней показывать
+STREAM_DEPTH = 10
+DISPLAY_DEPTH = 3
+# ANSI-последовательность очистки экрана и перевода курсора в начало
+CLEAR = "\x1b[2J\x1b[H"
+
+def enable_ansi_on_windows():
+    """Включает обработку ANSI-последовательностей в консоли Windows 10+"""
+    if os.name != 'nt':
+        return
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
 def main():
     """Основная функция скринера"""
     log.info("🚀 Запускаем скринер на Tinkoff API (БОЕВОЙ КОНТУР)...")
     
     try:
         client = TinkoffAPIClientSimple()
-        
+    except Exception as e:
+        log.error("❌ Ошибка инициализации: {}", e)
+        return
+    
+    # Один gRPC-канал на проверку подключения, поиск инструментов и подписку
+    with client:
+        run_scanner(client)
+
+def run_scanner(client):
+    """Проверяет подключение и выводит стаканы по подписке до Ctrl+C"""
+    try:
         # Тестируем подключение
         test_data = client.get_orderbook("SBER")
         if test_data:
@@ -33,32 +59,49 @@ def main():
             return
     
     except Exception as e:
-        log.error(f"❌ Ошибка инициализации: {e}")
+        log.error("❌ Ошибка инициализации: {}", e)
         return
     
     # Список тикеров для мониторинга
     tickers = ["ABIO"]
     
+    # Последний полученный стакан по каждому тикеру
+    books = {}
+    
+    enable_ansi_on_windows()
+    
+    # Обновления приходят по подписке MarketDataStream, без опроса по таймеру
+    updates = client.stream_orderbooks(tickers, depth=STREAM_DEPTH)
     try:
-        while True:
-            # Очищаем консоль
-            os.system('clear' if os.name == 'posix' else 'cls')
+        for data in updates:
+            books[data.ticker] = data
             
-            print("🎯 СКРИНЕР СТАКАНОВ - TINKOFF API (БОЕВОЙ КОНТУР)")
-            print("ДАННЫЕ РЕАЛЬНЫЕ - БУДЬТЕ ОСТОРОЖНЫ!")
-            print("Для остановки нажмите Ctrl+C\n")
+            # Перерисовываем на каждое обновление, чтобы на экране всегда был последний стакан.
+            # Кадр собираем целиком: очистка экрана (без внешней команды) и все стаканы,
+            # затем выводим одной записью в stdout
+            frame = [
+                CLEAR,
+                "🎯 СКРИНЕР СТАКАНОВ - TINKOFF API (БОЕВОЙ КОНТУР)\n",
+                "ДАННЫЕ РЕАЛЬНЫЕ - БУДЬТЕ ОСТОРОЖНЫ!\n",
+                "Для остановки нажмите Ctrl+C\n\n",
+            ]
             
             for ticker in tickers:
-                client.print_pretty_orderbook(ticker, depth=3)
-                print()
+                if ticker in books:
+                    frame.append(client.format_orderbook_data(books[ticker], depth=DISPLAY_DEPTH))
+                    frame.append("\n")
             
-            print("🔄 Обновление через 1 секунд...")
-            time.sleep(1)
+            frame.append("🔄 Обновление по подписке на стакан (MarketDataStream)\n")
+            sys.stdout.write("".join(frame))
+            sys.stdout.flush()
             
     except KeyboardInterrupt:
         log.info("⏹️  Скринер остановлен пользователем")
     except Exception as e:
-        log.error(f"❌ Ошибка в скринере: {e}")
+        log.error("❌ Ошибка в скринере: {}", e)
+    finally:
+        # Закрываем генератор сразу: он отписывается и завершает поток запросов
+        updates.close()
 
 if __name__ == "__main__":
     main()
@@ -10,27 +10,38 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Tuple, Set
+from typing import Optional, Tuple, Set
+from importlib.util import find_spec
 import warnings
 warnings.filterwarnings('ignore')
 
+# pyarrow нужен только как движок pd.read_csv и для Parquet - проверяем наличие без импорта
+PYARROW_AVAILABLE = find_spec('pyarrow') is not None
+
 # Добавляем корень проекта в путь для импорта модулей
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+# Начиная с такой ширины матрицы цен корреляции считаются в float32 (SGEMM вдвое быстрее DGEMM,
+# а для отчёта с точностью до 3 знаков float64 не нужен)
+FLOAT32_MIN_COLUMNS = 200
+
 class CorrelationCalculator:
     """Класс для расчёта корреляций между инструментами"""
     
-    def __init__(self, min_correlation: float = 0.7, min_common_days: int = 100):
+    def __init__(self, min_correlation: float = 0.7, min_common_days: int = 100,
+                 export_matrix_csv: bool = False):
         """
         Инициализация калькулятора корреляций
         
         Args:
             min_correlation: Минимальная корреляция для отбора пар
             min_common_days: Минимальное количество общих торговых дней
+            export_matrix_csv: Дополнительно сохранять матрицу корреляций в CSV
         """
         self.min_correlation = min_correlation
         self.min_common_days = min_common_days
+        self.export_matrix_csv = export_matrix_csv
         self.price_matrix = None
         self.correlation_matrix = None
         self.strong_pairs = []
@@ -75,10 +86,23 @@ class CorrelationCalculator:
         return latest_file
     
     def load_price_matrix(self, filepath: Path) -> pd.DataFrame:
-        """Загружает матрицу цен из CSV файла"""
+        """
+        Загружает матрицу цен из CSV файла.
+        Рядом с CSV сохраняется типизированный кэш (Parquet, без pyarrow - pickle),
+        который читается вместо CSV, пока он не старше самого CSV.
+        """
+        filepath = Path(filepath)
+        cache_path = filepath.with_suffix('.parquet' if PYARROW_AVAILABLE else '.pkl')
         try:
-            # Читаем CSV, устанавливаем дату как индекс
-            df = pd.read_csv(filepath, index_col='date', parse_dates=True)
+            if cache_path.exists() and cache_path.stat().st_mtime >= filepath.stat().st_mtime:
+                if PYARROW_AVAILABLE:
+                    df = pd.read_parquet(cache_path)
+                else:
+                    df = pd.read_pickle(cache_path)
+                print(f"📦 Матрица цен загружена из кэша: {cache_path}")
+            else:
+                df = self._read_price_csv(filepath)
+                self._save_price_cache(df, cache_path)
             print(f"✅ Загружена матрица цен: {df.shape[0]} дней × {df.shape[1]} инструментов")
             print(f"   Период: {df.index.min().date()} - {df.index.max().date()}")
             
@@ -88,6 +112,27 @@ class CorrelationCalculator:
             print(f"❌ Ошибка загрузки файла {filepath}: {e}")
             sys.exit(1)
     
+    @staticmethod
+    def _read_price_csv(filepath: Path) -> pd.DataFrame:
+        """Разбирает CSV с матрицей цен (дата - индекс, цены - float32)"""
+        # Читаем CSV (многопоточным движком pyarrow, если он установлен)
+        df = pd.read_csv(filepath, engine='pyarrow' if PYARROW_AVAILABLE else 'c')
+        # Даты в ISO-формате разбираем векторно по известному формату и делаем индексом
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601', cache=True)
+        # Цены храним в float32: матрица вдвое меньше, точности для отчётов хватает
+        return df.set_index('date').astype(np.float32)
+    
+    @staticmethod
+    def _save_price_cache(df: pd.DataFrame, cache_path: Path):
+        """Сохраняет кэш матрицы цен; ошибка записи не мешает анализу"""
+        try:
+            if PYARROW_AVAILABLE:
+                df.to_parquet(cache_path, compression='zstd')
+            else:
+                df.to_pickle(cache_path)
+        except Exception as e:
+            print(f"⚠️  Не удалось сохранить кэш матрицы цен {cache_path}: {e}")
+    
     def load_metadata(self, filepath: Optional[Path]) -> Optional[pd.DataFrame]:
         """Загружает метаданные инструментов"""
         if filepath is None:
@@ -105,8 +150,18 @@ class CorrelationCalculator:
         """Рассчитывает матрицу корреляций между всеми инструментами"""
         print(f"\n📊 Рассчитываем матрицу корреляций...")
         
-        # Рассчитываем корреляции
-        correlation_matrix = price_matrix.corr()
+        # Рассчитываем корреляции на массиве NumPy (матричные операции через BLAS)
+        dtype = np.float32 if price_matrix.shape[1] > FLOAT32_MIN_COLUMNS else np.float64
+        values = price_matrix.to_numpy(dtype=dtype)
+        if np.isnan(values).any():
+            corr = self._pairwise_correlation(values)
+        else:
+            corr = self._complete_correlation(values)
+        corr = corr.astype(np.float64, copy=False)
+        # После нормировки (особенно в float32) диагональ может отличаться от 1.0 в последнем знаке;
+        # NaN на диагонали (меньше 2 наблюдений или цена не менялась) оставляем как есть
+        np.fill_diagonal(corr, np.where(np.isnan(np.diagonal(corr)), np.nan, 1.0))
+        correlation_matrix = pd.DataFrame(corr, index=price_matrix.columns, columns=price_matrix.columns)
         
         print(f"✅ Матрица корреляций рассчитана")
         print(f"   Размер: {correlation_matrix.shape[0]} × {correlation_matrix.shape[1]}")
@@ -124,78 +179,118 @@ class CorrelationCalculator:
         
         return correlation_matrix
     
-    def find_strong_pairs(self, price_matrix: pd.DataFrame, correlation_matrix: pd.DataFrame) -> List[Dict]:
-        """Находит сильно коррелирующие пары инструментов"""
+    @staticmethod
+    def _complete_correlation(values: np.ndarray) -> np.ndarray:
+        """
+        Корреляция Пирсона для матрицы без пропусков (как np.corrcoef), но ковариация
+        нормируется на месте, без отдельной n×n матрицы произведений стандартных отклонений.
+        """
+        corr = np.cov(values, rowvar=False, dtype=values.dtype)
+        std = np.sqrt(np.diag(corr))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr /= std[:, None]
+            corr /= std[None, :]
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return corr
+    
+    @staticmethod
+    def _pairwise_correlation(values: np.ndarray) -> np.ndarray:
+        """
+        Корреляция Пирсона по попарно общим наблюдениям (как DataFrame.corr() при пропусках),
+        но несколькими матричными умножениями вместо цикла по парам столбцов.
+        """
+        mask = ~np.isnan(values)
+        # Центрирование на среднее столбца не меняет корреляцию, но снижает потерю точности в суммах
+        x = np.where(mask, values - np.nanmean(values, axis=0), 0.0)
+        m = mask.astype(values.dtype)
+        
+        # Для пары (i, j) все суммы берутся только по дням, где есть обе цены
+        n = m.T @ m                  # число общих дней
+        sum_x = x.T @ m              # сумма x_i по общим дням пары (i, j)
+        sum_xx = (x * x).T @ m       # сумма x_i^2 по общим дням пары (i, j)
+        sum_xy = x.T @ x             # сумма x_i * x_j
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = sum_xy - sum_x * sum_x.T / n
+            var_x = sum_xx - sum_x * sum_x / n
+            var_y = var_x.T
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[n < 2] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+    
+    def find_strong_pairs(self, price_matrix: pd.DataFrame, correlation_matrix: pd.DataFrame) -> pd.DataFrame:
+        """Находит сильно коррелирующие пары инструментов (DataFrame, отсортирован по абсолютной корреляции)"""
         print(f"\n🔍 Ищем сильно коррелирующие пары (корреляция > {self.min_correlation})...")
         
-        pairs = []
-        tickers = correlation_matrix.columns
-        corr_values = correlation_matrix.values
+        tickers = correlation_matrix.columns.to_numpy()
+        corr_values = correlation_matrix.to_numpy()
         
-        # Проходим по всем парам инструментов
-        for i in range(len(tickers)):
-            for j in range(i + 1, len(tickers)):
-                corr = corr_values[i, j]
-                
-                if not np.isnan(corr) and abs(corr) >= self.min_correlation:
-                    ticker1 = tickers[i]
-                    ticker2 = tickers[j]
-                    
-                    # Получаем данные по этим тикерам
-                    data1 = price_matrix[ticker1].dropna()
-                    data2 = price_matrix[ticker2].dropna()
-                    
-                    # Находим общие даты
-                    common_dates = data1.index.intersection(data2.index)
-                    common_days = len(common_dates)
-                    
-                    if common_days >= self.min_common_days:
-                        # Рассчитываем дополнительные метрики
-                        pair_data = {
-                            'ticker1': ticker1,
-                            'ticker2': ticker2,
-                            'correlation': corr,
-                            'abs_correlation': abs(corr),
-                            'common_days': common_days,
-                            'price_ratio': data1.mean() / data2.mean() if data2.mean() != 0 else 0,
-                            'volatility_ratio': data1.std() / data2.std() if data2.std() != 0 else 0,
-                            'ticker1_mean_price': data1.mean(),
-                            'ticker2_mean_price': data2.mean(),
-                            'ticker1_volatility': data1.std(),
-                            'ticker2_volatility': data2.std()
-                        }
-                        
-                        pairs.append(pair_data)
-        
-        # Сортируем по абсолютной корреляции
-        pairs.sort(key=lambda x: x['abs_correlation'], reverse=True)
+        # Кандидаты отбираем одной операцией по верхнему треугольнику матрицы (каждая пара один раз)
+        rows, cols = np.triu_indices_from(corr_values, k=1)
+        pair_corr = corr_values[rows, cols]
+        
+        # Общие дни для всех пар сразу: произведение матриц «цена есть» (вместо пересечения индексов на пару)
+        notna = price_matrix.notna().to_numpy(dtype=np.float32)
+        common_days_matrix = (notna.T @ notna).astype(np.int64)
+        pair_common_days = common_days_matrix[rows, cols]
+        
+        keep = (
+            ~np.isnan(pair_corr)
+            & (np.abs(pair_corr) >= self.min_correlation)
+            & (pair_common_days >= self.min_common_days)
+        )
+        
+        # Сортируем по абсолютной корреляции (устойчивая сортировка сохраняет порядок равных пар)
+        abs_corr = np.abs(pair_corr[keep])
+        order = np.argsort(-abs_corr, kind='stable')
+        i = rows[keep][order]
+        j = cols[keep][order]
+        
+        # Средняя цена и волатильность инструмента считаются один раз, а не в каждой его паре
+        means = price_matrix.mean().to_numpy()
+        stds = price_matrix.std().to_numpy()
+        mean1, mean2 = means[i], means[j]
+        std1, std2 = stds[i], stds[j]
+        
+        # Метрики пар собираем по столбцам, без словаря на каждую пару
+        pairs = pd.DataFrame({
+            'ticker1': tickers[i],
+            'ticker2': tickers[j],
+            'correlation': pair_corr[keep][order],
+            'abs_correlation': abs_corr[order],
+            'common_days': pair_common_days[keep][order],
+            'price_ratio': np.where(mean2 != 0, mean1 / np.where(mean2 != 0, mean2, 1), 0),
+            'volatility_ratio': np.where(std2 != 0, std1 / np.where(std2 != 0, std2, 1), 0),
+            'ticker1_mean_price': mean1,
+            'ticker2_mean_price': mean2,
+            'ticker1_volatility': std1,
+            'ticker2_volatility': std2
+        })
         
         print(f"✅ Найдено {len(pairs)} пар с корреляцией > {self.min_correlation}")
         
         return pairs
     
-    def analyze_pair_characteristics(self, pairs: List[Dict], metadata: Optional[pd.DataFrame]) -> pd.DataFrame:
+    def analyze_pair_characteristics(self, pairs_df: pd.DataFrame, metadata: Optional[pd.DataFrame]) -> pd.DataFrame:
         """Анализирует характеристики пар и добавляет информацию из метаданных"""
-        if not pairs:
+        if pairs_df.empty:
             return pd.DataFrame()
         
-        # Преобразуем в DataFrame
-        pairs_df = pd.DataFrame(pairs)
-        
         # Добавляем информацию из метаданных, если есть
         if metadata is not None:
-            # Создаем словари для быстрого поиска
-            metadata_dict = metadata.set_index('ticker').to_dict('index')
-            
-            # Добавляем информацию по первому тикеру
-            for field in ['type', 'currency', 'name']:
-                if field in metadata_dict.get(next(iter(metadata_dict.keys())), {}):
-                    pairs_df[f'ticker1_{field}'] = pairs_df['ticker1'].map(
-                        lambda x: metadata_dict.get(x, {}).get(field, 'N/A')
-                    )
-                    pairs_df[f'ticker2_{field}'] = pairs_df['ticker2'].map(
-                        lambda x: metadata_dict.get(x, {}).get(field, 'N/A')
+            fields = [field for field in ['type', 'currency', 'name'] if field in metadata.columns]
+            if fields:
+                meta_small = metadata.drop_duplicates('ticker').set_index('ticker')[fields]
+                
+                # Присоединяем метаданные к обоим тикерам пары (hash join вместо словаря и map)
+                for prefix in ['ticker1', 'ticker2']:
+                    pairs_df = pairs_df.merge(
+                        meta_small.add_prefix(f'{prefix}_'),
+                        left_on=prefix, right_index=True, how='left'
                     )
+                
+                meta_columns = [f'{prefix}_{field}' for field in fields for prefix in ['ticker1', 'ticker2']]
+                pairs_df[meta_columns] = pairs_df[meta_columns].fillna('N/A')
         
         return pairs_df
     
@@ -212,56 +307,52 @@ class CorrelationCalculator:
         # Ограничиваем количество пар для анализа
         pairs_to_test = pairs_df.head(top_n).copy()
         
-        for idx, row in pairs_to_test.iterrows():
-            ticker1 = row['ticker1']
-            ticker2 = row['ticker2']
-            
-            # Получаем данные
-            series1 = price_matrix[ticker1].dropna()
-            series2 = price_matrix[ticker2].dropna()
-            
-            # Находим общие даты
-            common_idx = series1.index.intersection(series2.index)
-            if len(common_idx) < 50:  # Нужно достаточно данных для теста
-                pairs_to_test.loc[idx, 'cointegration_pvalue'] = np.nan
-                pairs_to_test.loc[idx, 'cointegration_score'] = np.nan
-                continue
-            
-            # Выравниваем данные
-            series1_aligned = series1.loc[common_idx]
-            series2_aligned = series2.loc[common_idx]
-            
-            try:
-                # Простой тест на коинтеграцию (упрощенный)
-                # В реальности нужно использовать statsmodels.tsa.stattools.coint
-                # Здесь используем упрощенный подход - корреляция остатков
-                
-                # Рассчитываем спред
-                spread = series1_aligned - series2_aligned
-                
-                # Проверяем стационарность спреда через автокорреляцию
-                # (упрощенный заменитель теста Дики-Фуллера)
-                from scipy import stats
-                
-                # Рассчитываем автокорреляцию первого порядка
-                if len(spread) > 1:
-                    autocorr = spread.autocorr(lag=1)
-                    # Чем ближе autocorr к 0, тем более стационарный ряд
-                    pairs_to_test.loc[idx, 'cointegration_score'] = 1 - abs(autocorr)
-                else:
-                    pairs_to_test.loc[idx, 'cointegration_score'] = np.nan
-                
-                # Простая оценка p-value (условная)
-                pairs_to_test.loc[idx, 'cointegration_pvalue'] = 0.05 if abs(autocorr) < 0.3 else 0.5
-                
-            except Exception as e:
-                pairs_to_test.loc[idx, 'cointegration_pvalue'] = np.nan
-                pairs_to_test.loc[idx, 'cointegration_score'] = np.nan
+        # Спреды всех пар одной матрицей (NaN там, где нет цены хотя бы одного инструмента)
+        series1 = price_matrix[pairs_to_test['ticker1']].to_numpy(dtype=np.float64)
+        series2 = price_matrix[pairs_to_test['ticker2']].to_numpy(dtype=np.float64)
+        spreads = series1 - series2
+        common_days = (~np.isnan(spreads)).sum(axis=0)
+        
+        # Простой тест на коинтеграцию (упрощенный)
+        # В реальности нужно использовать statsmodels.tsa.stattools.coint
+        # Здесь проверяем стационарность спреда через автокорреляцию первого порядка
+        # (упрощенный заменитель теста Дики-Фуллера)
+        autocorr = np.abs(self._lag1_autocorr(spreads))
+        
+        # Чем ближе autocorr к 0, тем более стационарный ряд; простая оценка p-value (условная)
+        enough_data = common_days >= 50  # Нужно достаточно данных для теста
+        pairs_to_test['cointegration_score'] = np.where(enough_data, 1 - autocorr, np.nan)
+        pairs_to_test['cointegration_pvalue'] = np.where(
+            enough_data, np.where(autocorr < 0.3, 0.05, 0.5), np.nan
+        )
         
         print(f"✅ Коинтеграция рассчитана для {len(pairs_to_test)} пар")
         
         return pairs_to_test
     
+    @staticmethod
+    def _lag1_autocorr(spreads: np.ndarray) -> np.ndarray:
+        """
+        Автокорреляция первого порядка для каждого столбца (как Series.autocorr(lag=1)
+        по ряду без пропусков): соседними считаются подряд идущие непустые значения.
+        """
+        valid = ~np.isnan(spreads)
+        # Для каждой строки - номер предыдущей непустой строки того же столбца (-1, если её нет)
+        rows = np.where(valid, np.arange(len(spreads))[:, None], -1)
+        last_valid = np.maximum.accumulate(rows, axis=0)
+        prev = np.vstack([np.full((1, spreads.shape[1]), -1), last_valid[:-1]])
+        has_pair = valid & (prev >= 0)
+        
+        current = np.where(has_pair, spreads, 0.0)
+        previous = np.where(has_pair, np.take_along_axis(spreads, np.maximum(prev, 0), axis=0), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = has_pair.sum(axis=0)
+            current = np.where(has_pair, current - current.sum(axis=0) / n, 0.0)
+            previous = np.where(has_pair, previous - previous.sum(axis=0) / n, 0.0)
+            return (current * previous).sum(axis=0) / np.sqrt(
+                (current * current).sum(axis=0) * (previous * previous).sum(axis=0)
+            )
+    
     def save_results(self, pairs_df: pd.DataFrame, correlation_matrix: pd.DataFrame, price_matrix: pd.DataFrame):
         """Сохраняет результаты анализа"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -273,10 +364,19 @@ class CorrelationCalculator:
             print(f"💾 Пары сохранены: {pairs_file}")
             print(f"   Всего пар: {len(pairs_df)}")
         
-        # 2. Сохраняем полную матрицу корреляций
-        corr_matrix_file = f"correlation_matrix_{timestamp}.csv"
-        correlation_matrix.to_csv(corr_matrix_file)
+        # 2. Сохраняем полную матрицу корреляций в бинарном виде (без форматирования n² чисел в текст)
+        # Загрузка: data = np.load(file); data['corr'], data['tickers']
+        corr_matrix_file = f"correlation_matrix_{timestamp}.npz"
+        np.savez_compressed(
+            corr_matrix_file,
+            corr=correlation_matrix.to_numpy(),
+            tickers=correlation_matrix.columns.to_numpy().astype(str)
+        )
         print(f"💾 Матрица корреляций сохранена: {corr_matrix_file}")
+        if self.export_matrix_csv:
+            corr_matrix_csv = f"correlation_matrix_{timestamp}.csv"
+            correlation_matrix.to_csv(corr_matrix_csv)
+            print(f"💾 Матрица корреляций (CSV): {corr_matrix_csv}")
         
         # 3. Создаем файл с рекомендациями
         if not pairs_df.empty:
@@ -390,7 +490,7 @@ class CorrelationCalculator:
         # 4. Находим сильно коррелирующие пары
         strong_pairs = self.find_strong_pairs(price_matrix, correlation_matrix)
         
-        if not strong_pairs:
+        if strong_pairs.empty:
             print("❌ Не найдено сильно коррелирующих пар")
             print("   Попробуйте уменьшить min_correlation или увеличить min_common_days")
             return
@@ -413,7 +513,8 @@ def main():
         # Настройки можно менять
         calculator = CorrelationCalculator(
             min_correlation=0.7,    # Минимальная корреляция
-            min_common_days=100     # Минимальное общих дней
+            min_common_days=100,    # Минимальное общих дней
+            export_matrix_csv=False # Дублировать матрицу корреляций в CSV
         )
         calculator.run()
         
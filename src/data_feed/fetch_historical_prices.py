@@ -10,8 +10,7 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Set
-import time
+from typing import Optional, Dict, Set
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,6 +21,9 @@ sys.path.insert(0, str(project_root))
 from dotenv import load_dotenv
 from tinkoff.invest import Client, CandleInterval
 from tinkoff.invest.utils import now
+from src.utils.candles import candle_window, fetch_candles
+from src.utils.quotations import quotations_to_array
+from src.utils.rate_limit import RateLimiter
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -83,63 +85,75 @@ class HistoricalPricesFetcher:
             print(f"❌ Ошибка загрузки файла {filepath}: {e}")
             sys.exit(1)
     
-    def get_historical_data_sync(self, figi: str, days_back: int = 365) -> Optional[pd.DataFrame]:
+    # Минимальный интервал между запросами по инструментам, секунды (лимиты API)
+    REQUEST_INTERVAL = 0.5
+    
+    def get_historical_data_sync(self, figi: str, days_back: int = 365, client=None,
+                                 interval: CandleInterval = CandleInterval.CANDLE_INTERVAL_DAY) -> Optional[pd.DataFrame]:
         """
         Синхронно получает исторические данные по FIGI
         
         Args:
             figi: FIGI инструмента
             days_back: Количество дней истории
+            client: Открытый клиент Tinkoff (если None - открывается новый)
+            interval: Интервал свечей
         
         Returns:
             DataFrame с колонками: ['date', 'open', 'high', 'low', 'close', 'volume']
+        
+        Raises:
+            ValueError: Интервал свечей не поддерживается (нет в CANDLE_WINDOWS)
         """
-        try:
+        # Неподдерживаемый интервал - ошибка вызова, а не «нет данных»: проверяем до запросов
+        candle_window(interval)
+        
+        if client is None:
             with Client(self.token) as client:
-                # Рассчитываем период
-                to_date = now()
-                from_date = to_date - timedelta(days=days_back)
-                
-                # Запрашиваем дневные свечи
-                candles = client.get_all_candles(
-                    figi=figi,
-                    from_=from_date,
-                    to=to_date,
-                    interval=CandleInterval.CANDLE_INTERVAL_DAY
-                )
-                
-                # Конвертируем в DataFrame
-                data = []
-                for candle in candles:
-                    data.append({
-                        'date': candle.time.date(),
-                        'open': self._quotation_to_float(candle.open),
-                        'high': self._quotation_to_float(candle.high),
-                        'low': self._quotation_to_float(candle.low),
-                        'close': self._quotation_to_float(candle.close),
-                        'volume': candle.volume
-                    })
-                
-                if not data:
-                    print(f"   ⚠️  Нет исторических данных для FIGI: {figi[:10]}...")
-                    return None
-                
-                df = pd.DataFrame(data)
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.sort_values('date')
-                
-                return df
-                
+                return self.get_historical_data_sync(figi, days_back, client, interval)
+        
+        try:
+            # Рассчитываем период
+            to_date = now()
+            from_date = to_date - timedelta(days=days_back)
+            
+            # Запрашиваем свечи (окнами по лимиту API, параллельно)
+            candles = fetch_candles(client, figi, from_date, to_date, interval)
+            
+            if not candles:
+                print(f"   ⚠️  Нет исторических данных для FIGI: {figi[:10]}...")
+                return None
+            
+            # Цены конвертируем векторно: units + nano * 1e-9 сразу для всех свечей
+            n = len(candles)
+            if interval == CandleInterval.CANDLE_INTERVAL_DAY:
+                dates = [candle.time.date() for candle in candles]
+            else:
+                dates = [candle.time for candle in candles]
+            opens = quotations_to_array([candle.open for candle in candles])
+            highs = quotations_to_array([candle.high for candle in candles])
+            lows = quotations_to_array([candle.low for candle in candles])
+            closes = quotations_to_array([candle.close for candle in candles])
+            volumes = np.fromiter((candle.volume for candle in candles), dtype=np.int64, count=n)
+            
+            # Конвертируем в DataFrame
+            df = pd.DataFrame({
+                'date': dates,
+                'open': opens,
+                'high': highs,
+                'low': lows,
+                'close': closes,
+                'volume': volumes
+            })
+            df['date'] = pd.to_datetime(df['date'])
+            df = df.sort_values('date')
+            
+            return df
+            
         except Exception as e:
             print(f"   ❌ Ошибка получения данных для FIGI {figi[:10]}...: {e}")
             return None
     
-    def _quotation_to_float(self, quotation) -> float:
-        """Конвертация Quotation в float"""
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def fetch_all_historical_data(self, instruments_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         """Загружает исторические данные по всем инструментам"""
         total = len(instruments_df)
@@ -151,45 +165,48 @@ class HistoricalPricesFetcher:
         failed = 0
         min_days = 30  # Минимальное количество дней данных для анализа
         
-        for i, (_, row) in enumerate(instruments_df.iterrows(), 1):
-            ticker = row['ticker']
-            figi = row['figi']
-            name = row['name']
-            
-            print(f"[{i:3}/{total}] {ticker:10} - {name[:30]:30}...", end="", flush=True)
-            
-            # Загружаем исторические данные
-            df = self.get_historical_data_sync(figi, days_back=365)
-            
-            if df is not None and len(df) >= min_days:
-                self.historical_data[ticker] = df
-                successful += 1
+        limiter = RateLimiter(self.REQUEST_INTERVAL)
+        
+        # Один клиент (и gRPC-канал) на все запросы вместо нового на каждый инструмент
+        with Client(self.token) as client:
+            for i, (_, row) in enumerate(instruments_df.iterrows(), 1):
+                ticker = row['ticker']
+                figi = row['figi']
+                name = row['name']
                 
-                # Сохраняем метаданные
-                self.metadata.append({
-                    'ticker': ticker,
-                    'name': name[:50],
-                    'figi': figi,
-                    'type': row['type'],
-                    'currency': row['currency'],
-                    'data_points': len(df),
-                    'first_date': df['date'].min().date(),
-                    'last_date': df['date'].max().date(),
-                    'avg_volume': df['volume'].mean(),
-                    'price_change_%': ((df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0] * 100) if len(df) > 1 else 0
-                })
+                print(f"[{i:3}/{total}] {ticker:10} - {name[:30]:30}...", end="", flush=True)
                 
-                print(f" ✅ {len(df)} дней данных")
-            else:
-                failed += 1
-                if df is not None and len(df) < min_days:
-                    print(f" ❌ мало данных ({len(df)} < {min_days} дней)")
+                # Не чаще одного запроса в REQUEST_INTERVAL (время самого запроса не теряется на паузу)
+                limiter.wait()
+                
+                # Загружаем исторические данные
+                df = self.get_historical_data_sync(figi, days_back=365, client=client)
+                
+                if df is not None and len(df) >= min_days:
+                    self.historical_data[ticker] = df
+                    successful += 1
+                    
+                    # Сохраняем метаданные
+                    self.metadata.append({
+                        'ticker': ticker,
+                        'name': name[:50],
+                        'figi': figi,
+                        'type': row['type'],
+                        'currency': row['currency'],
+                        'data_points': len(df),
+                        'first_date': df['date'].min().date(),
+                        'last_date': df['date'].max().date(),
+                        'avg_volume': df['volume'].mean(),
+                        'price_change_%': ((df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0] * 100) if len(df) > 1 else 0
+                    })
+                    
+                    print(f" ✅ {len(df)} дней данных")
                 else:
-                    print(" ❌ ошибка загрузки")
-            
-            # Пауза между запросами чтобы не превысить лимиты API
-            if i < total:
-                time.sleep(0.5)
+                    failed += 1
+                    if df is not None and len(df) < min_days:
+                        print(f" ❌ мало данных ({len(df)} < {min_days} дней)")
+                    else:
+                        print(" ❌ ошибка загрузки")
         
         print("-" * 60)
         print(f"📊 Итог: {successful} успешно, {failed} с ошибками")
@@ -259,46 +259,50 @@ class CointegratedPairsFinder:
         tickers = self.price_matrix.columns.tolist()
         n_tickers = len(tickers)
         pairs = []
+        # Позиции столбцов пар из pairs (чтобы не искать их по тикеру на этапе 2)
+        pair_positions = []
+        
+        # Матрица цен и маска «цена есть» один раз; пары адресуем номерами столбцов, без dropna() на пару
+        values = self.price_matrix.to_numpy(dtype=np.float64)
+        notna = ~np.isnan(values)
         
         # Этап 1: Быстрый фильтр по корреляции
         for i in range(n_tickers):
+            col_i = values[:, i]
             for j in range(i + 1, n_tickers):
-                ticker1 = tickers[i]
-                ticker2 = tickers[j]
-                
-                # Получаем данные
-                data1 = self.price_matrix[ticker1].dropna()
-                data2 = self.price_matrix[ticker2].dropna()
-                
-                # Находим общие даты
-                common_idx = data1.index.intersection(data2.index)
-                if len(common_idx) < self.min_common_days:
+                # Общие даты
+                valid = notna[:, i] & notna[:, j]
+                common_days = int(np.count_nonzero(valid))
+                if common_days < self.min_common_days:
                     continue
                 
-                # Рассчитываем корреляцию
-                corr = data1.loc[common_idx].corr(data2.loc[common_idx])
+                # Рассчитываем корреляцию по общим датам
+                corr = np.corrcoef(col_i[valid], values[valid, j])[0, 1]
                 
                 if abs(corr) >= self.min_correlation:
                     pairs.append({
-                        'ticker1': ticker1,
-                        'ticker2': ticker2,
+                        'ticker1': tickers[i],
+                        'ticker2': tickers[j],
                         'correlation': corr,
-                        'common_days': len(common_idx)
+                        'common_days': common_days
                     })
+                    pair_positions.append((i, j))
         
         print(f"   Найдено {len(pairs)} пар с корреляцией > {self.min_correlation}")
         print(f"   Этап 2/3: Тест коинтеграции Engle-Granger")
         
         # Этап 2: Тест коинтеграции
         cointegrated_pairs = []
-        for i, pair in enumerate(pairs):
+        for i, (pair, (col1, col2)) in enumerate(zip(pairs, pair_positions)):
             ticker1 = pair['ticker1']
             ticker2 = pair['ticker2']
             
             print(f"   Пара {i+1}/{len(pairs)}: {ticker1} ↔ {ticker2}", end="", flush=True)
             
-            series1 = self.price_matrix[ticker1].dropna()
-            series2 = self.price_matrix[ticker2].dropna()
+            # Ряды пары, сразу выровненные по общим датам
+            aligned = self.price_matrix.iloc[notna[:, col1] & notna[:, col2], [col1, col2]]
+            series1 = aligned.iloc[:, 0]
+            series2 = aligned.iloc[:, 1]
             
             # Тест коинтеграции
             coint_stat, coint_pvalue, is_cointegrated = self.test_cointegration(series1, series2)
@@ -310,9 +314,8 @@ class CointegratedPairsFinder:
                 hedge_ratio, r_squared, intercept = self.calculate_hedge_ratio(series1, series2)
                 
                 if not np.isnan(hedge_ratio):
-                    # Строим спред
-                    common_idx = series1.index.intersection(series2.index)
-                    spread = series1.loc[common_idx] - hedge_ratio * series2.loc[common_idx]
+                    # Строим спред (ряды уже выровнены по общим датам)
+                    spread = series1 - hedge_ratio * series2
                     
                     # ADF тест спреда
                     adf_stat, adf_pvalue, is_stationary = self.test_spread_stationarity(spread)
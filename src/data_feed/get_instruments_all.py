@@ -6,7 +6,9 @@
 
 import os
 import sys
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -16,6 +18,7 @@ sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
 from tinkoff.invest import Client, InstrumentStatus
+from src.utils.quotations import quotation_to_float
 from src.utils.logger import log, log_api_call
 
 # Загружаем переменные окружения
@@ -25,7 +28,7 @@ class InstrumentFetcherRF:
     """Класс для получения инструментов российского фондового рынка с Tinkoff Invest API"""
     
     # Коды бирж для российского фондового рынка
-    RUSSIAN_EXCHANGES = ['MOEX', 'SPBX', 'SPB']  # Московская биржа, СПБ биржа
+    RUSSIAN_EXCHANGES = frozenset({'MOEX', 'SPBX', 'SPB'})  # Московская биржа, СПБ биржа
     
     def __init__(self):
         self.token = os.getenv('INVEST_TOKEN')
@@ -36,121 +39,139 @@ class InstrumentFetcherRF:
         
         log.info("🚀 Инициализация InstrumentFetcherRF (только РФ фондовый рынок)")
     
-    def fetch_shares(self):
-        """Получение списка акций"""
+    def fetch_shares(self, client=None):
+        """Получение списка акций (client - открытый клиент Tinkoff, если None - открывается новый)"""
+        if client is None:
+            with Client(self.token) as client:
+                return self.fetch_shares(client)
+        
         try:
             log_api_call("instruments", "shares")
-            start_time = datetime.now()
+            start_time = time.perf_counter_ns()
             
-            with Client(self.token) as client:
-                # Запрашиваем базовый список инструментов, доступных для торговли через API
-                response = client.instruments.shares(
-                    instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
-                )
+            # Запрашиваем базовый список инструментов, доступных для торговли через API
+            response = client.instruments.shares(
+                instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+            )
                 
-            duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-            log.info(f"✅ Получено {len(response.instruments)} акций за {duration_ms:.1f} мс")
+            duration_ms = (time.perf_counter_ns() - start_time) * 1e-6
+            log.info("✅ Получено {} акций за {:.1f} мс", len(response.instruments), duration_ms)
             log_api_call("instruments", "shares", duration_ms, count=len(response.instruments))
             
             return response.instruments
             
         except Exception as e:
-            log.error(f"❌ Ошибка получения акций: {e}")
+            log.error("❌ Ошибка получения акций: {}", e)
             return []
     
-    def fetch_bonds(self):
-        """Получение списка облигаций"""
+    def fetch_bonds(self, client=None):
+        """Получение списка облигаций (client - открытый клиент Tinkoff, если None - открывается новый)"""
+        if client is None:
+            with Client(self.token) as client:
+                return self.fetch_bonds(client)
+        
         try:
             log_api_call("instruments", "bonds")
-            start_time = datetime.now()
+            start_time = time.perf_counter_ns()
             
-            with Client(self.token) as client:
-                # Запрашиваем базовый список инструментов, доступных для торговли через API
-                response = client.instruments.bonds(
-                    instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
-                )
+            # Запрашиваем базовый список инструментов, доступных для торговли через API
+            response = client.instruments.bonds(
+                instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+            )
                 
-            duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-            log.info(f"✅ Получено {len(response.instruments)} облигаций за {duration_ms:.1f} мс")
+            duration_ms = (time.perf_counter_ns() - start_time) * 1e-6
+            log.info("✅ Получено {} облигаций за {:.1f} мс", len(response.instruments), duration_ms)
             log_api_call("instruments", "bonds", duration_ms, count=len(response.instruments))
             
             return response.instruments
             
         except Exception as e:
-            log.error(f"❌ Ошибка получения облигаций: {e}")
+            log.error("❌ Ошибка получения облигаций: {}", e)
             return []
     
+    def fetch_all(self):
+        """Параллельно получает акции и облигации через один клиент (запросы идут по одному gRPC-каналу)"""
+        with Client(self.token) as client:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                shares_future = executor.submit(self.fetch_shares, client)
+                bonds_future = executor.submit(self.fetch_bonds, client)
+                return shares_future.result(), bonds_future.result()
+    
     def filter_russian_instruments(self, instruments):
         """Фильтрация инструментов: только российский фондовый рынок и доступные для торговли через API"""
         filtered = []
         for instr in instruments:
             # Проверяем, доступен ли инструмент для торговли через API
-            if not (hasattr(instr, 'api_trade_available_flag') and instr.api_trade_available_flag):
+            if not getattr(instr, 'api_trade_available_flag', False):
                 continue
             
             # Проверяем, что инструмент торгуется на российской бирже
-            if hasattr(instr, 'exchange'):
+            exchange = getattr(instr, 'exchange', None)
+            if exchange is not None:
                 # Проверяем, что биржа в списке российских
-                if instr.exchange in self.RUSSIAN_EXCHANGES:
+                if exchange in self.RUSSIAN_EXCHANGES:
                     filtered.append(instr)
                 else:
                     # Логируем отфильтрованные инструменты для отладки
-                    log.debug(f"Отфильтрован инструмент {instr.ticker}: биржа {instr.exchange}")
+                    log.debug("Отфильтрован инструмент {}: биржа {}", instr.ticker, exchange)
             else:
                 # Если нет информации о бирже, пропускаем
-                log.debug(f"Инструмент {instr.ticker} без информации о бирже")
+                log.debug("Инструмент {} без информации о бирже", instr.ticker)
         
-        log.info(f"📊 После фильтрации по РФ рынку: {len(filtered)} из {len(instruments)} инструментов")
+        log.info("📊 После фильтрации по РФ рынку: {} из {} инструментов", len(filtered), len(instruments))
         return filtered
     
+    # Колонки DataFrame с инструментами (sector - только у акций, nominal - только у облигаций)
+    DATAFRAME_COLUMNS = [
+        'ticker', 'name', 'figi', 'type', 'currency', 'lot', 'min_price_increment',
+        'uid', 'exchange', 'sector', 'country_of_risk', 'nominal'
+    ]
+    
     def instruments_to_dataframe(self, shares, bonds):
         """Конвертация инструментов в DataFrame с информацией о бирже"""
-        data = []
-        
+        # Строки собираем кортежами в порядке DATAFRAME_COLUMNS (без словаря на каждую запись)
         # Обработка акций
-        for share in shares:
-            data.append({
-                'ticker': share.ticker,
-                'name': share.name,
-                'figi': share.figi,
-                'type': 'share',
-                'currency': share.currency,
-                'lot': share.lot,
-                'min_price_increment': self._quotation_to_float(share.min_price_increment) 
-                if hasattr(share, 'min_price_increment') else None,
-                'uid': share.uid if hasattr(share, 'uid') else None,
-                'exchange': share.exchange if hasattr(share, 'exchange') else 'N/A',
-                'sector': share.sector if hasattr(share, 'sector') else 'N/A',
-                'country_of_risk': share.country_of_risk if hasattr(share, 'country_of_risk') else 'N/A'
-            })
+        data = [
+            (
+                share.ticker,
+                share.name,
+                share.figi,
+                'share',
+                share.currency,
+                share.lot,
+                quotation_to_float(getattr(share, 'min_price_increment', None)),
+                getattr(share, 'uid', None),
+                getattr(share, 'exchange', 'N/A'),
+                getattr(share, 'sector', 'N/A'),
+                getattr(share, 'country_of_risk', 'N/A'),
+                None
+            )
+            for share in shares
+        ]
         
         # Обработка облигаций
-        for bond in bonds:
-            data.append({
-                'ticker': bond.ticker,
-                'name': bond.name,
-                'figi': bond.figi,
-                'type': 'bond',
-                'currency': bond.currency,
-                'lot': bond.lot,
-                'min_price_increment': self._quotation_to_float(bond.min_price_increment) 
-                if hasattr(bond, 'min_price_increment') else None,
-                'uid': bond.uid if hasattr(bond, 'uid') else None,
-                'exchange': bond.exchange if hasattr(bond, 'exchange') else 'N/A',
-                'country_of_risk': bond.country_of_risk if hasattr(bond, 'country_of_risk') else 'N/A',
-                'nominal': self._quotation_to_float(bond.nominal) if hasattr(bond, 'nominal') else None
-            })
+        data.extend(
+            (
+                bond.ticker,
+                bond.name,
+                bond.figi,
+                'bond',
+                bond.currency,
+                bond.lot,
+                quotation_to_float(getattr(bond, 'min_price_increment', None)),
+                getattr(bond, 'uid', None),
+                getattr(bond, 'exchange', 'N/A'),
+                None,
+                getattr(bond, 'country_of_risk', 'N/A'),
+                quotation_to_float(getattr(bond, 'nominal', None))
+            )
+            for bond in bonds
+        )
         
-        df = pd.DataFrame(data)
-        log.info(f"📁 Создан DataFrame с {len(df)} инструментами")
+        df = pd.DataFrame.from_records(data, columns=self.DATAFRAME_COLUMNS)
+        log.info("📁 Создан DataFrame с {} инструментами", len(df))
         return df
     
-    def _quotation_to_float(self, quotation):
-        """Конвертация Quotation в float (как в существующем коде)"""
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def save_to_csv(self, df, filename=None):
         """Сохранение DataFrame в CSV файл в корневой папке проекта"""
         if df.empty:
@@ -164,7 +185,7 @@ class InstrumentFetcherRF:
         # Сохраняем в корневую папку проекта
         filepath = Path(project_root) / filename
         df.to_csv(filepath, index=False, encoding='utf-8')
-        log.info(f"💾 Данные сохранены в {filepath} ({len(df)} записей)")
+        log.info("💾 Данные сохранены в {} ({} записей)", filepath, len(df))
         
         return filepath
     
@@ -173,8 +194,7 @@ class InstrumentFetcherRF:
         log.info("🎯 Начало получения списка инструментов российского фондового рынка (акции и облигации)")
         
         # Получаем инструменты
-        shares = self.fetch_shares()
-        bonds = self.fetch_bonds()
+        shares, bonds = self.fetch_all()
         
         # Фильтруем (только российский рынок и доступные для API-торговли)
         filtered_shares = self.filter_russian_instruments(shares)
@@ -254,7 +274,7 @@ def main():
     except KeyboardInterrupt:
         print("\n⏹️  Прервано пользователем")
     except Exception as e:
-        log.error(f"Критическая ошибка: {e}")
+        log.error("Критическая ошибка: {}", e)
         import traceback
         traceback.print_exc()
 
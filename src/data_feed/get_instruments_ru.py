@@ -6,7 +6,9 @@
 
 import os
 import sys
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -16,6 +18,7 @@ sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
 from tinkoff.invest import Client, InstrumentStatus
+from src.utils.quotations import quotation_to_float
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -51,17 +54,20 @@ class InstrumentFetcherRU:
         
         log.info("🚀 Инициализация InstrumentFetcherRU (страна риска = RU)")
     
-    def fetch_shares(self):
-        """Получение списка акций"""
+    def fetch_shares(self, client=None):
+        """Получение списка акций (client - открытый клиент Tinkoff, если None - открывается новый)"""
+        if client is None:
+            with Client(self.token) as client:
+                return self.fetch_shares(client)
+        
         try:
-            start_time = datetime.now()
+            start_time = time.perf_counter_ns()
             
-            with Client(self.token) as client:
-                response = client.instruments.shares(
-                    instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
-                )
+            response = client.instruments.shares(
+                instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+            )
                 
-            duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+            duration_ms = (time.perf_counter_ns() - start_time) * 1e-6
             log.info(f"✅ Получено {len(response.instruments)} акций за {duration_ms:.1f} мс")
             
             return response.instruments
@@ -70,17 +76,20 @@ class InstrumentFetcherRU:
             log.error(f"❌ Ошибка получения акций: {e}")
             return []
     
-    def fetch_bonds(self):
-        """Получение списка облигаций"""
+    def fetch_bonds(self, client=None):
+        """Получение списка облигаций (client - открытый клиент Tinkoff, если None - открывается новый)"""
+        if client is None:
+            with Client(self.token) as client:
+                return self.fetch_bonds(client)
+        
         try:
-            start_time = datetime.now()
+            start_time = time.perf_counter_ns()
             
-            with Client(self.token) as client:
-                response = client.instruments.bonds(
-                    instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
-                )
+            response = client.instruments.bonds(
+                instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+            )
                 
-            duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+            duration_ms = (time.perf_counter_ns() - start_time) * 1e-6
             log.info(f"✅ Получено {len(response.instruments)} облигаций за {duration_ms:.1f} мс")
             
             return response.instruments
@@ -89,6 +98,14 @@ class InstrumentFetcherRU:
             log.error(f"❌ Ошибка получения облигаций: {e}")
             return []
     
+    def fetch_all(self):
+        """Параллельно получает акции и облигации через один клиент (запросы идут по одному gRPC-каналу)"""
+        with Client(self.token) as client:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                shares_future = executor.submit(self.fetch_shares, client)
+                bonds_future = executor.submit(self.fetch_bonds, client)
+                return shares_future.result(), bonds_future.result()
+    
     def filter_ru_instruments(self, instruments):
         """Фильтрация инструментов: только country_of_risk = 'RU' и доступные для торговли через API"""
         filtered = []
@@ -97,14 +114,15 @@ class InstrumentFetcherRU:
         
         for instr in instruments:
             # Проверяем, доступен ли инструмент для торговли через API
-            if not (hasattr(instr, 'api_trade_available_flag') and instr.api_trade_available_flag):
+            if not getattr(instr, 'api_trade_available_flag', False):
                 not_api_count += 1
                 continue
             
             # Проверяем страну риска (основной критерий - строго 'RU')
-            if hasattr(instr, 'country_of_risk'):
+            country_of_risk = getattr(instr, 'country_of_risk', None)
+            if country_of_risk is not None:
                 # Приводим к строке и проверяем
-                country = str(instr.country_of_risk).strip()
+                country = str(country_of_risk).strip()
                 if country.upper() == 'RU':
                     filtered.append(instr)
                 else:
@@ -121,56 +139,59 @@ class InstrumentFetcherRU:
         
         return filtered
     
+    # Колонки DataFrame с инструментами (sector - только у акций, nominal - только у облигаций)
+    DATAFRAME_COLUMNS = [
+        'ticker', 'name', 'figi', 'type', 'currency', 'lot', 'min_price_increment',
+        'uid', 'exchange', 'sector', 'country_of_risk', 'class_code', 'nominal'
+    ]
+    
     def instruments_to_dataframe(self, shares, bonds):
         """Конвертация инструментов в DataFrame"""
-        data = []
-        
+        # Строки собираем кортежами в порядке DATAFRAME_COLUMNS (без словаря на каждую запись)
         # Обработка акций
-        for share in shares:
-            data.append({
-                'ticker': share.ticker,
-                'name': share.name,
-                'figi': share.figi,
-                'type': 'share',
-                'currency': getattr(share, 'currency', 'N/A'),
-                'lot': share.lot,
-                'min_price_increment': self._quotation_to_float(getattr(share, 'min_price_increment', None)),
-                'uid': getattr(share, 'uid', None),
-                'exchange': getattr(share, 'exchange', 'N/A'),
-                'sector': getattr(share, 'sector', 'N/A'),
-                'country_of_risk': getattr(share, 'country_of_risk', 'N/A'),
-                'class_code': getattr(share, 'class_code', 'N/A')
-            })
+        data = [
+            (
+                share.ticker,
+                share.name,
+                share.figi,
+                'share',
+                getattr(share, 'currency', 'N/A'),
+                share.lot,
+                quotation_to_float(getattr(share, 'min_price_increment', None)),
+                getattr(share, 'uid', None),
+                getattr(share, 'exchange', 'N/A'),
+                getattr(share, 'sector', 'N/A'),
+                getattr(share, 'country_of_risk', 'N/A'),
+                getattr(share, 'class_code', 'N/A'),
+                None
+            )
+            for share in shares
+        ]
         
         # Обработка облигаций
-        for bond in bonds:
-            data.append({
-                'ticker': bond.ticker,
-                'name': bond.name,
-                'figi': bond.figi,
-                'type': 'bond',
-                'currency': getattr(bond, 'currency', 'N/A'),
-                'lot': bond.lot,
-                'min_price_increment': self._quotation_to_float(getattr(bond, 'min_price_increment', None)),
-                'uid': getattr(bond, 'uid', None),
-                'exchange': getattr(bond, 'exchange', 'N/A'),
-                'country_of_risk': getattr(bond, 'country_of_risk', 'N/A'),
-                'nominal': self._quotation_to_float(getattr(bond, 'nominal', None)),
-                'class_code': getattr(bond, 'class_code', 'N/A')
-            })
+        data.extend(
+            (
+                bond.ticker,
+                bond.name,
+                bond.figi,
+                'bond',
+                getattr(bond, 'currency', 'N/A'),
+                bond.lot,
+                quotation_to_float(getattr(bond, 'min_price_increment', None)),
+                getattr(bond, 'uid', None),
+                getattr(bond, 'exchange', 'N/A'),
+                None,
+                getattr(bond, 'country_of_risk', 'N/A'),
+                getattr(bond, 'class_code', 'N/A'),
+                quotation_to_float(getattr(bond, 'nominal', None))
+            )
+            for bond in bonds
+        )
         
-        df = pd.DataFrame(data)
+        df = pd.DataFrame.from_records(data, columns=self.DATAFRAME_COLUMNS)
         log.info(f"📁 Создан DataFrame с {len(df)} инструментами")
         return df
     
-    def _quotation_to_float(self, quotation):
-        """Конвертация Quotation в float"""
-        if quotation is None:
-            return None
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def save_to_csv(self, df, filename=None):
         """Сохранение DataFrame в CSV файл в корневой папке проекта"""
         if df.empty:
@@ -193,8 +214,7 @@ class InstrumentFetcherRU:
         log.info("🎯 Начало получения инструментов с country_of_risk = 'RU'")
         
         # Получаем инструменты
-        shares = self.fetch_shares()
-        bonds = self.fetch_bonds()
+        shares, bonds = self.fetch_all()
         
         # Фильтруем (только country_of_risk = 'RU' и доступные для API-торговли)
         filtered_shares = self.filter_ru_instruments(shares)
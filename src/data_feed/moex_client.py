@@ -1,5 +1,9 @@
-import requests
-import pandas as pd
+import asyncio
+import aiohttp
+import ujson
+from cachetools import TTLCache
+from src.utils.event_loop import new_event_loop
+from src.utils.http import get_session
 from src.utils.logger import log
 
 class MOEXClient:
@@ -7,55 +11,157 @@ class MOEXClient:
     Клиент для работы с API Московской биржи
     """
     
+    # Таймауты (подключение, чтение) в секундах
+    REQUEST_TIMEOUT = (3.05, 10)
+    # Справочные данные о бумагах меняются редко - кэшируем на час
+    SECURITY_CACHE_SIZE = 512
+    SECURITY_CACHE_TTL = 3600
+    
     def __init__(self):
         self.base_url = "https://iss.moex.com/iss"
-        self.session = requests.Session()
+        # Общая сессия с пулом соединений и повторами (src/utils/http.py)
+        self.session = get_session()
+        
+        self._security_cache = TTLCache(maxsize=self.SECURITY_CACHE_SIZE, ttl=self.SECURITY_CACHE_TTL)
+        # Event loop для синхронных обёрток создаётся один раз, а не на каждый вызов,
+        # и в нём же живёт aiohttp-сессия (соединения держатся между вызовами)
+        self._runner = None
+        self._aio_session = None
         log.info("MOEX клиент инициализирован")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def get_security_info(self, ticker: str) -> dict:
-        """Получить базовую информацию о бумаге"""
+        """Получить базовую информацию о бумаге (с кэшем на SECURITY_CACHE_TTL секунд)"""
+        cached = self._security_cache.get(ticker)
+        if cached is not None:
+            return cached
+        
         url = f"{self.base_url}/securities/{ticker}.json"
         try:
-            response = self.session.get(url)
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
-            data = response.json()
-            log.info(f"Данные по {ticker} получены")
+            data = ujson.loads(response.content)
+            self._security_cache[ticker] = data
+            log.info("Данные по {} получены", ticker)
             return data
         except Exception as e:
-            log.error(f"Ошибка получения данных по {ticker}: {e}")
+            log.error("Ошибка получения данных по {}: {}", ticker, e)
             return {}
     
+    async def _fetch_json(self, session: aiohttp.ClientSession, url: str) -> dict:
+        """Асинхронно загрузить JSON по URL"""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return ujson.loads(await response.read())
+    
+    def _new_aio_session(self) -> aiohttp.ClientSession:
+        """Новая aiohttp-сессия (вызывать внутри event loop, в котором она будет работать)"""
+        connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.REQUEST_TIMEOUT[0],
+            sock_read=self.REQUEST_TIMEOUT[1]
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+    
+    async def get_many_security_info_async(self, tickers: list, session: aiohttp.ClientSession = None) -> dict:
+        """
+        Получить базовую информацию сразу по нескольким бумагам (параллельно)
+        
+        Args:
+            tickers: Список тикеров
+            session: Открытая aiohttp-сессия (если None - создаётся на время вызова)
+        """
+        result = {}
+        missing = []
+        for ticker in tickers:
+            # Один get: между проверкой и чтением запись TTLCache может устареть
+            cached = self._security_cache.get(ticker)
+            if cached is not None:
+                result[ticker] = cached
+            else:
+                missing.append(ticker)
+        tickers = missing
+        if not tickers:
+            return result
+        
+        if session is None:
+            async with self._new_aio_session() as session:
+                return result | await self.get_many_security_info_async(tickers, session)
+        
+        urls = [f"{self.base_url}/securities/{ticker}.json" for ticker in tickers]
+        responses = await asyncio.gather(
+            *(self._fetch_json(session, url) for url in urls),
+            return_exceptions=True
+        )
+        
+        for ticker, data in zip(tickers, responses):
+            if isinstance(data, Exception):
+                log.error("Ошибка получения данных по {}: {}", ticker, data)
+                result[ticker] = {}
+            else:
+                self._security_cache[ticker] = data
+                result[ticker] = data
+        log.info("Данные по {} из {} бумаг получены", sum(1 for ticker in tickers if result[ticker]), len(tickers))
+        return result
+    
+    def get_many_security_info(self, tickers: list) -> dict:
+        """Синхронная обёртка над get_many_security_info_async (один event loop на все вызовы)"""
+        if self._runner is None:
+            self._runner = asyncio.Runner(loop_factory=new_event_loop)
+        return self._runner.run(self._get_many_security_info_shared(tickers))
+    
+    async def _get_many_security_info_shared(self, tickers: list) -> dict:
+        """get_many_security_info_async на общей сессии клиента (создаётся в event loop обёрток)"""
+        if self._aio_session is None:
+            self._aio_session = self._new_aio_session()
+        return await self.get_many_security_info_async(tickers, self._aio_session)
+    
+    def close(self):
+        """Закрывает aiohttp-сессию и event loop синхронных обёрток"""
+        if self._runner is not None:
+            if self._aio_session is not None:
+                self._runner.run(self._aio_session.close())
+                self._aio_session = None
+            self._runner.close()
+            self._runner = None
+    
+    # Поля рыночных данных MOEX, которые возвращаем, и их названия у нас
+    MARKET_DATA_FIELDS = {'LAST': 'last_price', 'CHANGE': 'change', 'VOLTODAY': 'volume'}
+    
     def get_current_market_data(self, ticker: str) -> dict:
         """Получить текущие рыночные данные"""
         url = f"{self.base_url}/engines/stock/markets/shares/boards/TQBR/securities/{ticker}.json"
         try:
-            response = self.session.get(url)
-            data = response.json()
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
+            data = ujson.loads(response.content)
             
-            # Извлекаем рыночные данные
-            market_data = data.get('marketdata', {}).get('data', [])
+            # Извлекаем рыночные данные: поля выбираем по названию колонок
+            block = data.get('marketdata', {})
+            market_data = block.get('data', [])
             if market_data:
-                # Базовые поля из рыночных данных
-                last_trade = market_data[0]
+                last_trade = dict(zip(block.get('columns', []), market_data[0]))
                 return {
-                    'last_price': last_trade[12],  # LAST
-                    'change': last_trade[13],      # CHANGE
-                    'volume': last_trade[9]        # VOLUME
+                    name: last_trade.get(column)
+                    for column, name in self.MARKET_DATA_FIELDS.items()
                 }
             return {}
         except Exception as e:
-            log.error(f"Ошибка получения рыночных данных {ticker}: {e}")
+            log.error("Ошибка получения рыночных данных {}: {}", ticker, e)
             return {}
 
 if __name__ == "__main__":
     # Тестируем клиент
-    client = MOEXClient()
-    
-    # Тест получения данных по SBER
-    sber_info = client.get_security_info("SBER")
-    if sber_info:
-        log.info("✅ MOEX клиент работает - данные SBER получены")
-    
-    sber_market = client.get_current_market_data("SBER")
-    if sber_market:
-        log.info(f"✅ Рыночные данные SBER: {sber_market}")
+    with MOEXClient() as client:
+        # Тест получения данных по SBER
+        sber_info = client.get_security_info("SBER")
+        if sber_info:
+            log.info("✅ MOEX клиент работает - данные SBER получены")
+        
+        sber_market = client.get_current_market_data("SBER")
+        if sber_market:
+            log.info("✅ Рыночные данные SBER: {}", sber_market)
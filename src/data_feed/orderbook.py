@@ -1,21 +1,26 @@
-import requests
 import pandas as pd
 import sys
 import os
 
-# Добавляем путь для импорта utils
+# Добавляем корень проекта в путь: utils импортируем как src.utils, как в moex_client.py,
+# иначе utils.http и src.utils.http станут разными модулями с разными сессиями
 current_dir = os.path.dirname(os.path.abspath(__file__))
-src_root = os.path.dirname(current_dir)
-sys.path.insert(0, src_root)
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
 
-from utils.logger import log
+from src.utils.http import get_session
+from src.utils.logger import log
 
 class MOEXOrderbook:
     """Клиент для получения стакана заявок с MOEX"""
     
+    # Таймауты (подключение, чтение) в секундах
+    REQUEST_TIMEOUT = (3.05, 10)
+    
     def __init__(self):
         self.base_url = "https://iss.moex.com/iss"
-        self.session = requests.Session()
+        # Общая сессия с пулом соединений и повторами (utils/http.py)
+        self.session = get_session()
         log.info("MOEX Orderbook клиент инициализирован")
     
     def get_orderbook(self, ticker: str) -> dict:
@@ -23,18 +28,18 @@ class MOEXOrderbook:
         url = f"{self.base_url}/engines/stock/markets/shares/securities/{ticker}/orderbook.json"
         
         try:
-            response = self.session.get(url)
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             data = response.json()
             
             # Парсим стакан
             orderbook_data = self._parse_orderbook(data)
-            log.info(f"Стакан по {ticker} получен")
+            log.info("Стакан по {} получен", ticker)
             return orderbook_data
             
         except Exception as e:
-            log.error(f"Ошибка получения стакана {ticker}: {e}")
-            log.error(f"URL был: {url}")
+            log.error("Ошибка получения стакана {}: {}", ticker, e)
+            log.error("URL был: {}", url)
             return {}
     
     def _parse_orderbook(self, data: dict) -> dict:
@@ -1,5 +1,6 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -9,27 +10,39 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 src_root = os.path.dirname(current_dir)
 sys.path.insert(0, src_root)
 
-from tinkoff.invest import Client
+from utils.grpc_channel import SharedClientMixin, subscribe_order_books
 from utils.logger import log
+from utils.orderbook_snapshot import OrderbookSnapshot
+from utils.quotations import quotation_to_float
 
-class TinkoffAPIClientSimple:
+class TinkoffAPIClientSimple(SharedClientMixin):
     def __init__(self):
         self.token = os.getenv('INVEST_TOKEN')
         if not self.token:
             log.error("❌ Токен не найден в .env файле")
             raise ValueError("Токен не найден")
+        # Клиент (gRPC-канал) открывается при первом обращении и переиспользуется всеми запросами
+        self._init_client()
+        # Найденные инструменты по тикеру (FIGI не меняется - повторный поиск не нужен)
+        self._instrument_cache = {}
         log.info("Tinkoff API клиент инициализирован (БОЕВОЙ КОНТУР)")
     
-    def find_instrument_by_ticker(self, ticker):
-        with Client(self.token) as client:
-            instruments = client.instruments.find_instrument(query=ticker)
-            for instrument in instruments.instruments:
-                if instrument.ticker == ticker:
-                    log.info(f"Найден инструмент: {instrument.name} ({instrument.ticker}), FIGI: {instrument.figi}")
-                    # УБИРАЕМ проблемные атрибуты
-                    return instrument
-            log.error(f"Инструмент с тикером {ticker} не найден")
+    def find_instrument_by_ticker(self, ticker, client=None):
+        """Поиск инструмента по тикеру (client - открытый клиент Tinkoff, по умолчанию общий self.client)"""
+        cached = self._instrument_cache.get(ticker)
+        if cached is not None:
+            return cached
+        if client is None:
+            client = self.client
+        
+        instruments = client.instruments.find_instrument(query=ticker)
+        instrument = next((i for i in instruments.instruments if i.ticker == ticker), None)
+        if instrument is None:
+            log.error("Инструмент с тикером {} не найден", ticker)
             return None
+        log.info("Найден инструмент: {} ({}), FIGI: {}", instrument.name, instrument.ticker, instrument.figi)
+        self._instrument_cache[ticker] = instrument
+        return instrument
     
     def get_orderbook(self, ticker: str, depth: int = 5):
         instrument = self.find_instrument_by_ticker(ticker)
@@ -37,26 +50,64 @@ class TinkoffAPIClientSimple:
             return None
             
         try:
-            with Client(self.token) as client:
-                log.info(f"Запрашиваем стакан для FIGI: {instrument.figi}, глубина: {depth}")
-                orderbook = client.market_data.get_order_book(figi=instrument.figi, depth=depth)
-                
-                # Диагностика стакана
-                log.info(f"Стакан получен: {orderbook}")
-                log.info(f"Количество bids: {len(orderbook.bids)}")
-                log.info(f"Количество asks: {len(orderbook.asks)}")
-                
-                return {
-                    'ticker': ticker,
-                    'instrument': instrument,
-                    'orderbook': orderbook,
-                    'timestamp': datetime.now()
-                }
-                
+            log.info("Запрашиваем стакан для FIGI: {}, глубина: {}", instrument.figi, depth)
+            orderbook = self.client.market_data.get_order_book(figi=instrument.figi, depth=depth)
+            
+            # Диагностика стакана
+            log.info("Стакан получен: {}", orderbook)
+            log.info("Количество bids: {}", len(orderbook.bids))
+            log.info("Количество asks: {}", len(orderbook.asks))
+            
+            return OrderbookSnapshot(
+                ticker=ticker,
+                instrument=instrument,
+                orderbook=orderbook,
+                timestamp=datetime.now(),
+                source='gRPC (sync)'
+            )
+            
         except Exception as e:
-            log.error(f"Ошибка получения стакана {ticker}: {e}")
+            log.error("Ошибка получения стакана {}: {}", ticker, e)
             return None
     
+    def stream_orderbooks(self, tickers, depth: int = 10):
+        """
+        Подписывается на стаканы через MarketDataStream (один gRPC-поток
+        на все тикеры) и отдаёт обновления OrderbookSnapshot (как get_orderbook).
+        
+        Args:
+            tickers: Список тикеров
+            depth: Глубина стакана (для подписки допустимы 1, 10, 20, 30, 40, 50)
+        """
+        # Все тикеры ищем параллельно по тому же каналу, что и подписка
+        client = self.client
+        with ThreadPoolExecutor(max_workers=min(8, len(tickers)) or 1) as executor:
+            found = executor.map(lambda ticker: self.find_instrument_by_ticker(ticker, client), tickers)
+            instruments = {instrument.figi: instrument for instrument in found if instrument}
+        
+        if not instruments:
+            log.error("Не найдено ни одного инструмента для подписки")
+            return
+        
+        log.info("Подписка на стаканы: {}", ', '.join(i.ticker for i in instruments.values()))
+        orderbooks = subscribe_order_books(client, list(instruments), depth)
+        try:
+            for orderbook in orderbooks:
+                instrument = instruments.get(orderbook.figi)
+                if instrument is None:
+                    continue
+                yield OrderbookSnapshot(
+                    ticker=instrument.ticker,
+                    instrument=instrument,
+                    orderbook=orderbook,
+                    timestamp=datetime.now(),
+                    source='gRPC (stream)'
+                )
+        finally:
+            # Отписка и завершение потоков gRPC
+            orderbooks.close()
+            log.info("Подписка на стаканы завершена")
+    
     def print_pretty_orderbook(self, ticker: str, depth: int = 5):
         data = self.get_orderbook(ticker, depth)
         
@@ -64,50 +115,65 @@ class TinkoffAPIClientSimple:
             print(f"❌ Не удалось получить стакан для {ticker}")
             return
         
-        orderbook = data['orderbook']
-        instrument = data['instrument']
+        self.print_orderbook_data(data)
+    
+    def print_orderbook_data(self, data, depth: int = None):
+        """Печатает стакан из данных get_orderbook/stream_orderbooks (depth - сколько уровней показать)"""
+        sys.stdout.write(self.format_orderbook_data(data, depth))
+        sys.stdout.flush()
+    
+    def format_orderbook_data(self, data, depth: int = None) -> str:
+        """Собирает текст стакана целиком, чтобы вывести его одной записью в stdout"""
+        ticker = data.ticker
+        orderbook = data.orderbook
+        instrument = data.instrument
+        # Горячие атрибуты и методы берём в локальные переменные один раз на кадр
+        asks = orderbook.asks
+        bids = orderbook.bids
+        q2f = quotation_to_float
         
-        print(f"\n📊 Стакан по {ticker} ({instrument.name}):")
-        print("=" * 60)
+        lines = [f"\n📊 Стакан по {ticker} ({instrument.name}):", "=" * 60]
+        append = lines.append
         
-        if orderbook.asks:
-            print("💰 ПРОДАЖИ (asks):")
-            for ask in orderbook.asks:
-                price = self.quotation_to_float(ask.price)
-                quantity = ask.quantity
-                print(f"   {price:10.2f} | {quantity:6} лотов")
+        if asks:
+            append("💰 ПРОДАЖИ (asks):")
+            lines.extend([
+                f"   {q2f(level.price):10.2f} | {level.quantity:6} лотов"
+                for level in asks[:depth]
+            ])
         else:
-            print("💰 ПРОДАЖИ (asks): пусто")
+            append("💰 ПРОДАЖИ (asks): пусто")
         
-        print("-" * 30)
+        append("-" * 30)
         
-        if orderbook.bids:
-            print("🛒 ПОКУПКИ (bids):")
-            for bid in orderbook.bids:
-                price = self.quotation_to_float(bid.price)
-                quantity = bid.quantity
-                print(f"   {price:10.2f} | {quantity:6} лотов")
+        if bids:
+            append("🛒 ПОКУПКИ (bids):")
+            lines.extend([
+                f"   {q2f(level.price):10.2f} | {level.quantity:6} лотов"
+                for level in bids[:depth]
+            ])
         else:
-            print("🛒 ПОКУПКИ (bids): пусто")
+            append("🛒 ПОКУПКИ (bids): пусто")
         
-        print("=" * 60)
-        if hasattr(orderbook, 'best_bid_price') and orderbook.best_bid_price:
-            print(f"💎 Лучший спрос: {self.quotation_to_float(orderbook.best_bid_price):.2f}")
+        append("=" * 60)
+        # В стаканах из MarketDataStream полей best_*_price нет
+        best_bid_price = getattr(orderbook, 'best_bid_price', None)
+        if best_bid_price is not None:
+            append(f"💎 Лучший спрос: {q2f(best_bid_price):.2f}")
         else:
-            print(f"💎 Лучший спрос: нет данных")
+            append(f"💎 Лучший спрос: нет данных")
             
-        if hasattr(orderbook, 'best_ask_price') and orderbook.best_ask_price:
-            print(f"💎 Лучшее предложение: {self.quotation_to_float(orderbook.best_ask_price):.2f}")
+        best_ask_price = getattr(orderbook, 'best_ask_price', None)
+        if best_ask_price is not None:
+            append(f"💎 Лучшее предложение: {q2f(best_ask_price):.2f}")
         else:
-            print(f"💎 Лучшее предложение: нет данных")
+            append(f"💎 Лучшее предложение: нет данных")
             
-        print(f"⏰ Время: {data['timestamp'].strftime('%H:%M:%S')}")
-    
-    def quotation_to_float(self, quotation):
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
+        # Время форматируем из полей напрямую - strftime заметно медленнее на каждом обновлении
+        ts = data.timestamp
+        append(f"⏰ Время: {ts.hour:02d}:{ts.minute:02d}:{ts.second:02d}")
+        return "\n".join(lines) + "\n"
 
 if __name__ == "__main__":
-    client = TinkoffAPIClientSimple()
-    client.print_pretty_orderbook("SBER")
+    with TinkoffAPIClientSimple() as client:
+        client.print_pretty_orderbook("SBER")
@@ -18,10 +18,10 @@ async def get_tinkoff_candles():
         ):
             candles.append([
                 candle.time.isoformat(),
-                candle.open.units + candle.open.nano / 1e9,
-                candle.high.units + candle.high.nano / 1e9,
-                candle.low.units + candle.low.nano / 1e9,
-                candle.close.units + candle.close.nano / 1e9,
+                candle.open.units + candle.open.nano * 1e-9,
+                candle.high.units + candle.high.nano * 1e-9,
+                candle.low.units + candle.low.nano * 1e-9,
+                candle.close.units + candle.close.nano * 1e-9,
                 candle.volume
             ])
         df = pd.DataFrame(candles, columns=['time', 'open', 'high', 'low', 'close', 'volume'])
@@ -19,10 +19,10 @@ async def main():
         ):
             candles.append({
                 'time': candle.time,
-                'open': candle.open.units + candle.open.nano / 1e9,
-                'high': candle.high.units + candle.high.nano / 1e9,
-                'low': candle.low.units + candle.low.nano / 1e9,
-                'close': candle.close.units + candle.close.nano / 1e9,
+                'open': candle.open.units + candle.open.nano * 1e-9,
+                'high': candle.high.units + candle.high.nano * 1e-9,
+                'low': candle.low.units + candle.low.nano * 1e-9,
+                'close': candle.close.units + candle.close.nano * 1e-9,
                 'volume': candle.volume
             })
         df_api = pd.DataFrame(candles).set_index('time').sort_index()
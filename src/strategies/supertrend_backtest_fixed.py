@@ -23,6 +23,10 @@ load_dotenv()
 
 from tinkoff.invest import AsyncClient, CandleInterval
 
+# Добавляем корень проекта в путь Python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from src.utils.quotations import quotation_to_float
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -66,11 +70,6 @@ class SupertrendBacktester:
         self.equity_curve = []
         self.daily_returns = []
         
-    def _quotation_to_float(self, quotation) -> float:
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def _convert_to_moscow_time(self, dt):
         """Конвертирует время из UTC в московское (UTC+3)"""
         if dt.tzinfo is None:
@@ -93,10 +92,10 @@ class SupertrendBacktester:
                     candle_time = self._convert_to_moscow_time(candle.time)
                     candles.append({
                         'time': candle_time,
-                        'open': self._quotation_to_float(candle.open),
-                        'high': self._quotation_to_float(candle.high),
-                        'low': self._quotation_to_float(candle.low),
-                        'close': self._quotation_to_float(candle.close),
+                        'open': quotation_to_float(candle.open, 0.0),
+                        'high': quotation_to_float(candle.high, 0.0),
+                        'low': quotation_to_float(candle.low, 0.0),
+                        'close': quotation_to_float(candle.close, 0.0),
                         'volume': candle.volume
                     })
                 
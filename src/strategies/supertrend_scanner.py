@@ -13,7 +13,6 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Any
 import pandas as pd
-import numpy as np
 
 # Загружаем переменные окружения из .env файла
 from dotenv import load_dotenv
@@ -22,6 +21,10 @@ load_dotenv()
 from tinkoff.invest import AsyncClient, CandleInterval
 from tinkoff.invest.utils import now
 
+# Добавляем корень проекта в путь Python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from src.utils.quotations import quotation_to_float
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -88,10 +91,10 @@ class SupertrendScanner:
                 ):
                     candles.append({
                         'time': candle.time,
-                        'open': self._quotation_to_float(candle.open),
-                        'high': self._quotation_to_float(candle.high),
-                        'low': self._quotation_to_float(candle.low),
-                        'close': self._quotation_to_float(candle.close),
+                        'open': quotation_to_float(candle.open, 0.0),
+                        'high': quotation_to_float(candle.high, 0.0),
+                        'low': quotation_to_float(candle.low, 0.0),
+                        'close': quotation_to_float(candle.close, 0.0),
                         'volume': candle.volume
                     })
                 
@@ -112,12 +115,6 @@ class SupertrendScanner:
             logger.error(f"Подробности: {traceback.format_exc()}")
             return pd.DataFrame()
     
-    def _quotation_to_float(self, quotation) -> float:
-        """Конвертирует Quotation в float"""
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def calculate_atr(self, df: pd.DataFrame, period: int = 5) -> pd.Series:
         """Расчет Average True Range (ATR)"""
         high_low = df['high'] - df['low']
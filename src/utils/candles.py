@@ -0,0 +1,100 @@
+"""
+Загрузка исторических свечей Tinkoff окнами по лимиту API.
+Общая для загрузчиков исторических данных (src/data_feed/fetch_historical_*.py).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from tinkoff.invest import CandleInterval
+
+from src.utils.rate_limit import RateLimiter
+
+# Максимальный период одного запроса get_candles для интервала свечей
+CANDLE_WINDOWS = {
+    CandleInterval.CANDLE_INTERVAL_1_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_5_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_15_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_HOUR: timedelta(weeks=1),
+    CandleInterval.CANDLE_INTERVAL_DAY: timedelta(days=365),
+}
+# Сколько окон запрашиваем одновременно (ограничение нагрузки на API)
+CANDLE_WORKERS = 8
+# Минимальный интервал между запросами get_candles, секунды: лимит сервиса
+# котировок - 600 запросов в минуту, один ограничитель на весь процесс
+CANDLE_REQUEST_INTERVAL = 0.1
+CANDLE_LIMITER = RateLimiter(CANDLE_REQUEST_INTERVAL)
+# Повторы запроса окна при ошибке и пауза перед первым повтором (удваивается), секунды
+CANDLE_RETRIES = 2
+CANDLE_RETRY_DELAY = 0.5
+
+def candle_window(interval: CandleInterval) -> timedelta:
+    """Максимальный период одного запроса для интервала (ValueError, если интервал не поддерживается)"""
+    try:
+        return CANDLE_WINDOWS[interval]
+    except KeyError:
+        supported = ", ".join(i.name for i in CANDLE_WINDOWS)
+        raise ValueError(f"Интервал свечей {interval!r} не поддерживается (доступны: {supported})") from None
+
+def split_windows(from_date: datetime, to_date: datetime, window: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Делит период на последовательные окна не длиннее window (последнее может быть короче)"""
+    windows = []
+    start = from_date
+    while start < to_date:
+        end = min(start + window, to_date)
+        windows.append((start, end))
+        start = end
+    return windows
+
+def merge_candles(chunks) -> List:
+    """Склеивает свечи окон по времени: свеча на границе окон может прийти дважды - оставляем одну"""
+    candles = {candle.time: candle for chunk in chunks for candle in chunk}
+    return [candles[time] for time in sorted(candles)]
+
+def fetch_candles(client, figi: str, from_date: datetime, to_date: datetime,
+                  interval: CandleInterval, limiter: Optional[RateLimiter] = None) -> List:
+    """
+    Загружает свечи окнами не длиннее лимита API параллельно и склеивает их по времени.
+
+    Каждый запрос окна проходит через limiter (по умолчанию общий CANDLE_LIMITER).
+    Окно, которое не удалось загрузить и после CANDLE_RETRIES повторов, пропускается
+    с предупреждением, а уже загруженные окна сохраняются; если не загрузилось ни одно
+    окно, выбрасывается последняя ошибка.
+    """
+    if limiter is None:
+        limiter = CANDLE_LIMITER
+    windows = split_windows(from_date, to_date, candle_window(interval))
+
+    def fetch_window(bounds):
+        for attempt in range(CANDLE_RETRIES + 1):
+            limiter.wait()
+            try:
+                return list(client.market_data.get_candles(
+                    figi=figi,
+                    from_=bounds[0],
+                    to=bounds[1],
+                    interval=interval
+                ).candles)
+            except Exception as e:
+                error = e
+                if attempt < CANDLE_RETRIES:
+                    time.sleep(CANDLE_RETRY_DELAY * 2 ** attempt)
+        return error
+
+    # gRPC-канал клиента потокобезопасен - окна запрашиваются по нему одновременно
+    with ThreadPoolExecutor(max_workers=max(1, min(CANDLE_WORKERS, len(windows)))) as executor:
+        results = list(executor.map(fetch_window, windows))
+
+    chunks = []
+    errors = []
+    for (start, end), result in zip(windows, results):
+        if isinstance(result, Exception):
+            errors.append(result)
+            print(f"   ⚠️  Свечи {figi} за {start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M} не загружены: {result}")
+        else:
+            chunks.append(result)
+    if errors and not chunks:
+        raise errors[-1]
+    return merge_candles(chunks)
@@ -0,0 +1,17 @@
+"""
+Фабрика event loop для asyncio: uvloop, если установлен, иначе стандартный цикл
+"""
+
+import asyncio
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Создаёт новый event loop (на libuv, если доступен uvloop)"""
+    if UVLOOP_AVAILABLE:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
@@ -0,0 +1,95 @@
+"""
+Настройки gRPC-канала к Tinkoff Invest API и общий код клиентов поверх него.
+Один канал переиспользуется всеми запросами, поэтому держим его «тёплым»:
+keepalive-пинги не дают NAT и балансировщикам закрыть соединение в тихие периоды торгов.
+tinkoff.invest импортируется только при открытии канала или подписке: импорт тяжёлый.
+"""
+
+import threading
+
+# Передаются в tinkoff.invest.Client(..., options=CHANNEL_OPTIONS)
+CHANNEL_OPTIONS = [
+    # Пинг раз в 5 минут: чаще без данных сервер может ответить GOAWAY (too_many_pings)
+    ('grpc.keepalive_time_ms', 300_000),
+    # Сколько ждать ответа на пинг, прежде чем считать соединение разорванным
+    ('grpc.keepalive_timeout_ms', 20_000),
+    # Пинги разрешены и тогда, когда по каналу давно не было данных (подписка в тихом рынке)
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+class SharedClientMixin:
+    """
+    Общий клиент Tinkoff: gRPC-канал открывается при первом обращении к client
+    и переиспользуется всеми запросами до close() или выхода из with.
+    Наследник задаёт self.token и вызывает _init_client() в __init__.
+    """
+
+    def _init_client(self):
+        self._client_manager = None
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def client(self):
+        """Открытый клиент Tinkoff (создаётся при первом обращении)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from tinkoff.invest import Client
+                    self._client_manager = Client(self.token, options=CHANNEL_OPTIONS)
+                    self._client = self._client_manager.__enter__()
+        return self._client
+
+    def close(self):
+        """Закрывает gRPC-канал"""
+        with self._client_lock:
+            if self._client_manager is not None:
+                self._client_manager.__exit__(None, None, None)
+                self._client_manager = None
+                self._client = None
+
+def subscribe_order_books(client, figis, depth: int):
+    """
+    Подписывается на стаканы figis через MarketDataStream (один gRPC-поток на все
+    инструменты) и отдаёт объекты OrderBook из обновлений.
+    При закрытии генератора отправляет отписку, завершает поток запросов
+    и закрывает поток ответов. Для подписки допустимы глубины 1, 10, 20, 30, 40, 50.
+    """
+    from tinkoff.invest import (
+        MarketDataRequest,
+        OrderBookInstrument,
+        SubscribeOrderBookRequest,
+        SubscriptionAction,
+    )
+
+    # Устанавливается, когда потребитель перестал читать обновления (в том числе по Ctrl+C)
+    stop = threading.Event()
+
+    def order_book_request(action):
+        return MarketDataRequest(
+            subscribe_order_book_request=SubscribeOrderBookRequest(
+                subscription_action=action,
+                instruments=[OrderBookInstrument(figi=figi, depth=depth) for figi in figis]
+            )
+        )
+
+    def request_iterator():
+        yield order_book_request(SubscriptionAction.SUBSCRIPTION_ACTION_SUBSCRIBE)
+        # Держим поток запросов открытым, пока действует подписка, затем отписываемся и завершаем его
+        stop.wait()
+        yield order_book_request(SubscriptionAction.SUBSCRIPTION_ACTION_UNSUBSCRIBE)
+
+    stream = client.market_data_stream.market_data_stream(request_iterator())
+    try:
+        for market_data in stream:
+            if market_data.orderbook is not None:
+                yield market_data.orderbook
+    finally:
+        stop.set()
+        stream.close()
@@ -0,0 +1,38 @@
+"""
+Общая HTTP-сессия для всех клиентов проекта.
+Пул TCP/TLS-соединений переиспользуется всеми модулями процесса.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Размер пула соединений на хост
+POOL_SIZE = 32
+# Повторы с нарастающей паузой при перегрузке и временных ошибках сервера
+RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Возвращает общую для процесса сессию requests (создаётся при первом вызове).
+
+    Сессию можно использовать из нескольких потоков для get/post:
+    пул соединений urllib3 защищён блокировкой. Не меняйте headers/cookies
+    сессии из разных потоков - это общее состояние.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=RETRY)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate"})
+                _session = session
+    return _session
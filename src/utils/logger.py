@@ -42,7 +42,7 @@ class TradingLogger:
                    "<level>{message}</level>",
             level="INFO",
             colorize=True,
-            filter=lambda record: record["level"].name in ["INFO", "WARNING", "ERROR", "CRITICAL"]
+            filter=lambda record: record["level"].name in {"INFO", "WARNING", "ERROR", "CRITICAL"}
         )
         
         # 2. ТЕХНИЧЕСКИЕ ЛОГИ (все DEBUG сообщения)
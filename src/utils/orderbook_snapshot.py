@@ -0,0 +1,18 @@
+"""
+Снимок стакана Tinkoff: общий тип записей для клиентов стакана
+(src/data_feed/tinkoff_client_simple.py, scripts/tinkoff_grpc_client_fixed.py).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+@dataclass(slots=True)
+class OrderbookSnapshot:
+    """Снимок стакана по инструменту (фиксированный набор полей вместо словаря на каждое обновление)"""
+    ticker: str
+    instrument: Any
+    orderbook: Any  # Ответ API: GetOrderBookResponse (запрос) или OrderBook (подписка)
+    timestamp: datetime
+    source: str = ''
+    response_time_ms: float = 0.0
@@ -0,0 +1,54 @@
+"""
+Вычислительные ядра для конвертации Quotation (units + nano) в цены.
+При установленной numba ядра компилируются в машинный код, без неё используется NumPy.
+Используются стаканами (скрипты, бот) и загрузкой исторических свечей.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def quotations_to_prices(units: np.ndarray, nanos: np.ndarray) -> np.ndarray:
+        """Цены из массивов units и nano (int64) одного размера"""
+        out = np.empty(units.shape[0])
+        for i in range(units.shape[0]):
+            out[i] = units[i] + nanos[i] * 1e-9
+        return out
+else:
+    def quotations_to_prices(units: np.ndarray, nanos: np.ndarray) -> np.ndarray:
+        """Цены из массивов units и nano (int64) одного размера"""
+        return units + nanos * 1e-9
+
+def quotation_to_float(quotation, default=None):
+    """Цена из одного Quotation/MoneyValue (default, если значения нет)"""
+    if quotation is None:
+        return default
+    return quotation.units + quotation.nano * 1e-9
+
+def quotations_to_array(quotations: List) -> np.ndarray:
+    """Векторная конвертация списка Quotation в массив float"""
+    n = len(quotations)
+    units = np.fromiter((q.units for q in quotations), dtype=np.int64, count=n)
+    nanos = np.fromiter((q.nano for q in quotations), dtype=np.int64, count=n)
+    return quotations_to_prices(units, nanos)
+
+# Уровень стакана: цена (units + nano) и количество лотов
+LEVEL_DTYPE = np.dtype([('units', np.int64), ('nano', np.int32), ('quantity', np.int64)])
+
+def levels_to_arrays(levels) -> Tuple[np.ndarray, np.ndarray]:
+    """Векторная конвертация уровней стакана в массивы цен (float) и количеств"""
+    # Один проход по уровням: units, nano и quantity сразу в структурированный массив
+    arr = np.fromiter(
+        ((level.price.units, level.price.nano, level.quantity) for level in levels),
+        dtype=LEVEL_DTYPE,
+        count=len(levels),
+    )
+    return quotations_to_prices(arr['units'], arr['nano']), arr['quantity']
@@ -0,0 +1,29 @@
+"""
+Ограничение частоты запросов к внешним API
+"""
+
+import threading
+import time
+
+class RateLimiter:
+    """
+    Пропускает не более одного запроса за min_interval секунд.
+    Время, уже потраченное на предыдущий запрос, вычитается из паузы:
+    если запрос шёл дольше интервала, ожидания нет.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._last = None
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Дождаться разрешения на следующий запрос"""
+        with self._lock:
+            now = time.monotonic()
+            if self._last is not None:
+                delay = self.min_interval - (now - self._last)
+                if delay > 0:
+                    time.sleep(delay)
+                    now = time.monotonic()
+            self._last = now
@@ -23,6 +23,7 @@ from telegram_bot.handlers.basic import start, help_command, status
 from telegram_bot.handlers.settings import set_ticker, set_depth, set_interval
 from telegram_bot.handlers.orderbook import get_orderbook, start_monitoring, stop_monitoring
 from telegram_bot.config import bot_state, TELEGRAM_CHAT_ID, send_notification
+from src.utils.event_loop import new_event_loop
 from src.utils.logger import log, log_business, log_command
 
 # Загружаем переменные окружения
@@ -52,7 +53,7 @@ async def send_shutdown_message(bot):
 
 def signal_handler(signum, frame):
     """Обработчик сигналов завершения"""
-    log.warning(f"Получен сигнал завершения {signum}")
+    log.warning("Получен сигнал завершения {}", signum)
     shutdown_event.set()
 
 def create_application():
@@ -125,7 +126,7 @@ async def main_async():
             await application.updater.stop()
             await application.stop()
     except Exception as e:
-        log.error(f"Ошибка запуска бота: {e}")
+        log.error("Ошибка запуска бота: {}", e)
     finally:
         bot_state['is_running'] = False
         log_business("bot", "stop", "system")
@@ -137,12 +138,13 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
     
     try:
-        # Запускаем асинхронную основную функцию
-        asyncio.run(main_async())
+        # Запускаем асинхронную основную функцию (на uvloop, если он установлен)
+        with asyncio.Runner(loop_factory=new_event_loop) as runner:
+            runner.run(main_async())
     except KeyboardInterrupt:
         log.info("Завершение работы...")
     except Exception as e:
-        log.error(f"Критическая ошибка: {e}")
+        log.error("Критическая ошибка: {}", e)
 
 if __name__ == "__main__":
     main()
@@ -6,9 +6,11 @@
 import os
 import asyncio
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any
 from pathlib import Path
 import sys
+import threading
+from operator import itemgetter
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -16,36 +18,87 @@ sys.path.insert(0, str(project_root))
 from dotenv import load_dotenv
 load_dotenv()
 
+from src.utils.grpc_channel import SharedClientMixin
+from src.utils.quotations import levels_to_arrays
+
 try:
-    from tinkoff.invest import Client
+    from tinkoff.invest import InstrumentStatus
     print("✅ Tinkoff библиотеки импортированы")
 except ImportError as e:
     print(f"❌ Ошибка импорта Tinkoff: {e}")
     raise
 
-class TinkoffService:
+# Разделитель под заголовком стакана в сообщении
+TELEGRAM_SEPARATOR = "══════════════════════════════\n"
+
+class TinkoffService(SharedClientMixin):
+    # Индекс акций основного режима торгов (TQBR) по тикеру: общий для процесса, строится одним запросом shares()
+    _shares_index: Optional[Dict[str, Any]] = None
+    _shares_index_lock = threading.Lock()
+
     def __init__(self):
         self.token = os.getenv('INVEST_TOKEN')
         if not self.token:
             raise ValueError("❌ Токен Tinkoff API не найден в .env файле")
+        # Найденные инструменты по тикеру: FIGI не меняется, повторный поиск не нужен
+        self._instrument_cache: Dict[str, Any] = {}
+        # Клиент открывается один раз; gRPC-канал потокобезопасен и общий для всех запросов
+        self._init_client()
         print("🚀 TinkoffService инициализирован (версия: ТОЛЬКО СТАКАН)")
 
+    def _get_shares_index(self) -> Dict[str, Any]:
+        """Индекс акций TQBR по тикеру (загружается при первом обращении)"""
+        cls = type(self)
+        if cls._shares_index is None:
+            with cls._shares_index_lock:
+                if cls._shares_index is None:
+                    # Только инструменты, доступные для торговли через API (фильтр на стороне сервера)
+                    shares = self.client.instruments.shares(
+                        instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE
+                    ).instruments
+                    cls._shares_index = {
+                        share.ticker: share for share in shares if share.class_code == 'TQBR'
+                    }
+                    print(f"📦 Индекс акций TQBR: {len(cls._shares_index)} инструментов")
+        return cls._shares_index
+
+    @classmethod
+    def refresh_shares_index(cls):
+        """Сбрасывает индекс акций: он будет загружен заново при следующем поиске"""
+        with cls._shares_index_lock:
+            cls._shares_index = None
+
     async def find_instrument_by_ticker(self, ticker: str):
         return await asyncio.to_thread(self._find_instrument_by_ticker_sync, ticker)
 
     def _find_instrument_by_ticker_sync(self, ticker: str):
+        cached = self._instrument_cache.get(ticker)
+        if cached is not None:
+            return cached
         try:
-            with Client(self.token) as client:
-                found_instruments = client.instruments.find_instrument(query=ticker)
-                if not found_instruments.instruments:
-                    print(f"❌ Инструмент с тикером '{ticker}' не найден")
-                    return None
-                for instrument in found_instruments.instruments:
-                    if instrument.ticker == ticker:
-                        print(f"✅ Найден инструмент: {instrument.name} ({instrument.ticker})")
-                        return instrument
+            # Акции TQBR ищем в индексе без отдельного запроса, остальное - через find_instrument
+            try:
+                share = self._get_shares_index().get(ticker)
+            except Exception as e:
+                print(f"⚠️  Не удалось загрузить индекс акций: {e}")
+                share = None
+            if share is not None:
+                self._instrument_cache[ticker] = share
+                return share
+            found_instruments = self.client.instruments.find_instrument(query=ticker)
+            if not found_instruments.instruments:
+                print(f"❌ Инструмент с тикером '{ticker}' не найден")
+                return None
+            instrument = next(
+                (i for i in found_instruments.instruments if i.ticker == ticker),
+                None,
+            )
+            if instrument is None:
                 print(f"❌ Точное совпадение для тикера '{ticker}' не найдено")
                 return None
+            print(f"✅ Найден инструмент: {instrument.name} ({instrument.ticker})")
+            self._instrument_cache[ticker] = instrument
+            return instrument
         except Exception as e:
             print(f"❌ Ошибка поиска инструмента '{ticker}': {e}")
             import traceback
@@ -62,9 +115,10 @@ class TinkoffService:
             if not instrument:
                 return None
             print(f"📊 Запрашиваем стакан для '{ticker}' (глубина: {depth})...")
-            with Client(self.token) as client:
-                api_response = client.market_data.get_order_book(figi=instrument.figi, depth=depth)
-            orderbook_obj = api_response.orderbook if hasattr(api_response, 'orderbook') else api_response
+            api_response = self.client.market_data.get_order_book(figi=instrument.figi, depth=depth)
+            orderbook_obj = getattr(api_response, 'orderbook', None) or api_response
+            asks = getattr(orderbook_obj, 'asks', None)
+            bids = getattr(orderbook_obj, 'bids', None)
             print(f"   Ответ типа: {type(orderbook_obj).__name__}")
             result = {
                 'ticker': ticker,
@@ -74,18 +128,18 @@ class TinkoffService:
                 'timestamp': datetime.now(),
                 'depth': depth
             }
-            if hasattr(orderbook_obj, 'asks') and orderbook_obj.asks:
-                for ask in orderbook_obj.asks[:depth]:
-                    result['asks'].append({
-                        'price': self._quotation_to_float(ask.price),
-                        'quantity': ask.quantity
-                    })
-            if hasattr(orderbook_obj, 'bids') and orderbook_obj.bids:
-                for bid in orderbook_obj.bids[:depth]:
-                    result['bids'].append({
-                        'price': self._quotation_to_float(bid.price),
-                        'quantity': bid.quantity
-                    })
+            if asks:
+                prices, quantities = levels_to_arrays(asks[:depth])
+                result['asks'] = [
+                    {'price': price, 'quantity': quantity}
+                    for price, quantity in zip(prices.tolist(), quantities.tolist())
+                ]
+            if bids:
+                prices, quantities = levels_to_arrays(bids[:depth])
+                result['bids'] = [
+                    {'price': price, 'quantity': quantity}
+                    for price, quantity in zip(prices.tolist(), quantities.tolist())
+                ]
             print(f"✅ Данные стакана '{ticker}' получены")
             return result
         except Exception as e:
@@ -94,10 +148,10 @@ class TinkoffService:
             traceback.print_exc()
             return None
 
-    def _quotation_to_float(self, quotation) -> float:
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
+    @staticmethod
+    def _format_spread(best_ask: float, best_bid: float) -> str:
+        """Строка со спредом между лучшей ценой продажи и покупки"""
+        return f"📏 <b>Spread:</b> {best_ask - best_bid:.2f}"
 
     def calculate_spread(self, data: Dict[str, Any]) -> str:
         """Рассчитывает спред между лучшей ценой продажи и покупки"""
@@ -109,12 +163,7 @@ class TinkoffService:
             best_ask = min(ask['price'] for ask in data['asks'])
             # Лучшая цена покупки (самая высокая в bids)
             best_bid = max(bid['price'] for bid in data['bids'])
-            
-            # Рассчитываем спред
-            spread = best_ask - best_bid
-            
-            # Форматируем вывод
-            return f"📏 <b>Spread:</b> {spread:.2f}"
+            return self._format_spread(best_ask, best_bid)
         
         except (ValueError, KeyError) as e:
             return ""  # Если что-то пошло не так, просто не показываем спред
@@ -123,36 +172,49 @@ class TinkoffService:
         """Форматирует стакан для Telegram (с лучшими ценами и спредом)"""
         if not data or (not data['asks'] and not data['bids']):
             return f"❌ Не удалось получить стакан для {data.get('ticker', 'тикера')} или стакан пуст."
-        timestamp = data['timestamp'].strftime('%H:%M:%S')
-        message = f"<b>{data['ticker']} | {data['name']} | {timestamp}</b>\n"
-        message += "══════════════════════════════\n"
+        ts = data['timestamp']
+        depth = data['depth']
+        parts = [
+            f"<b>{data['ticker']} | {data['name']} | {ts.hour:02d}:{ts.minute:02d}:{ts.second:02d}</b>\n",
+            TELEGRAM_SEPARATOR,
+        ]
+        append = parts.append
+        price_key = itemgetter('price')
+        best_ask = best_bid = None
         
         if data['asks']:
-            message += "<b>SELL:</b>\n"
+            append("<b>SELL:</b>\n")
             # СОРТИРУЕМ ASKS ОТ БОЛЬШЕЙ ЦЕНЫ К МЕНЬШЕЙ (для продажи сначала самые выгодные цены)
-            sorted_asks = sorted(data['asks'], key=lambda x: x['price'], reverse=True)
-            for ask in sorted_asks[:data['depth']]:
-                message += f"{ask['price']:>8.2f} | {ask['quantity']:>5} лотов\n"
+            sorted_asks = sorted(data['asks'], key=price_key, reverse=True)
+            # Лучшая цена продажи - самая низкая, после сортировки она последняя
+            best_ask = sorted_asks[-1]['price']
+            parts.extend([
+                f"{ask['price']:>8.2f} | {ask['quantity']:>5} лотов\n"
+                for ask in sorted_asks[:depth]
+            ])
         else:
-            message += "<b>SELL:</b> нет данных\n"
+            append("<b>SELL:</b> нет данных\n")
         
-        message += "\n"
+        append("\n")
         
         if data['bids']:
-            message += "<b>BUY:</b>\n"
+            append("<b>BUY:</b>\n")
             # BIDS оставляем от большей цены к меньшей (для покупки сначала самые выгодные цены)
-            sorted_bids = sorted(data['bids'], key=lambda x: x['price'], reverse=True)
-            for bid in sorted_bids[:data['depth']]:
-                message += f"{bid['price']:>8.2f} | {bid['quantity']:>5} лотов\n"
+            sorted_bids = sorted(data['bids'], key=price_key, reverse=True)
+            # Лучшая цена покупки - самая высокая, после сортировки она первая
+            best_bid = sorted_bids[0]['price']
+            parts.extend([
+                f"{bid['price']:>8.2f} | {bid['quantity']:>5} лотов\n"
+                for bid in sorted_bids[:depth]
+            ])
         else:
-            message += "<b>BUY:</b> нет данных\n"
+            append("<b>BUY:</b> нет данных\n")
         
-        # РАССЧИТЫВАЕМ И ДОБАВЛЯЕМ СПРЕД
-        spread_text = self.calculate_spread(data)
-        if spread_text:
-            message += "\n" + spread_text
+        # Спред считаем по уже найденным лучшим ценам, без повторного прохода по уровням
+        if best_ask is not None and best_bid is not None:
+            append("\n" + self._format_spread(best_ask, best_bid))
         
-        return message
+        return "".join(parts)
 
 # Глобальный экземпляр сервиса
 _tinkoff_service = None
@@ -163,6 +225,8 @@ async def get_tinkoff_service():
     return _tinkoff_service
 async def close_tinkoff_service():
     global _tinkoff_service
+    if _tinkoff_service is not None:
+        _tinkoff_service.close()
     _tinkoff_service = None
 def format_orderbook_for_telegram(data: Dict[str, Any]) -> str:
     if not data:
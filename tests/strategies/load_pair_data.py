@@ -20,6 +20,8 @@ sys.path.insert(0, str(project_root))
 from dotenv import load_dotenv
 load_dotenv()
 
+from src.utils.quotations import quotation_to_float
+
 try:
     from tinkoff.invest import Client, CandleInterval
     from tinkoff.invest.utils import now
@@ -37,23 +39,26 @@ class PairDataLoader:
             raise ValueError("❌ Токен Tinkoff API не найден в .env файле")
         print("🚀 PairDataLoader инициализирован")
     
-    def find_instrument_by_ticker(self, ticker: str):
-        """Находит инструмент по тикеру"""
-        try:
+    def find_instrument_by_ticker(self, ticker: str, client=None):
+        """Находит инструмент по тикеру (client - открытый клиент Tinkoff, если None - открывается новый)"""
+        if client is None:
             with Client(self.token) as client:
-                found_instruments = client.instruments.find_instrument(query=ticker)
-                if not found_instruments.instruments:
-                    print(f"❌ Инструмент с тикером '{ticker}' не найден")
-                    return None
-                
-                for instrument in found_instruments.instruments:
-                    if instrument.ticker == ticker:
-                        print(f"✅ Найден инструмент: {instrument.name} ({instrument.ticker}), FIGI: {instrument.figi}")
-                        return instrument
-                
-                print(f"❌ Точное совпадение для тикера '{ticker}' не найдено")
+                return self.find_instrument_by_ticker(ticker, client)
+        
+        try:
+            found_instruments = client.instruments.find_instrument(query=ticker)
+            if not found_instruments.instruments:
+                print(f"❌ Инструмент с тикером '{ticker}' не найден")
                 return None
-                
+            
+            for instrument in found_instruments.instruments:
+                if instrument.ticker == ticker:
+                    print(f"✅ Найден инструмент: {instrument.name} ({instrument.ticker}), FIGI: {instrument.figi}")
+                    return instrument
+            
+            print(f"❌ Точное совпадение для тикера '{ticker}' не найдено")
+            return None
+            
         except Exception as e:
             print(f"❌ Ошибка поиска инструмента '{ticker}': {e}")
             return None
@@ -71,17 +76,18 @@ class PairDataLoader:
         """
         print(f"📊 Загружаем исторические данные для {ticker} за {days} дней...")
         
-        # Находим инструмент
-        instrument = self.find_instrument_by_ticker(ticker)
-        if not instrument:
-            return None
-        
-        # Рассчитываем даты
-        to_date = now()
-        from_date = to_date - timedelta(days=days)
-        
         try:
+            # Поиск инструмента и загрузка свечей идут через одно соединение
             with Client(self.token) as client:
+                # Находим инструмент
+                instrument = self.find_instrument_by_ticker(ticker, client)
+                if not instrument:
+                    return None
+                
+                # Рассчитываем даты
+                to_date = now()
+                from_date = to_date - timedelta(days=days)
+                
                 # Получаем свечи (дневные)
                 candles = client.get_all_candles(
                     figi=instrument.figi,
@@ -104,10 +110,10 @@ class PairDataLoader:
                 for candle in candles_list:
                     data.append({
                         'date': candle.time,
-                        'open': self._quotation_to_float(candle.open),
-                        'high': self._quotation_to_float(candle.high),
-                        'low': self._quotation_to_float(candle.low),
-                        'close': self._quotation_to_float(candle.close),
+                        'open': quotation_to_float(candle.open, 0.0),
+                        'high': quotation_to_float(candle.high, 0.0),
+                        'low': quotation_to_float(candle.low, 0.0),
+                        'close': quotation_to_float(candle.close, 0.0),
                         'volume': candle.volume
                     })
                 
@@ -126,12 +132,6 @@ class PairDataLoader:
             print(f"❌ Ошибка загрузки данных для {ticker}: {e}")
             return None
     
-    def _quotation_to_float(self, quotation) -> float:
-        """Конвертирует Quotation в float"""
-        if hasattr(quotation, 'units') and hasattr(quotation, 'nano'):
-            return quotation.units + quotation.nano / 1e9
-        return float(quotation) if quotation else 0.0
-    
     def load_pair_data(self, ticker1: str, ticker2: str, days: int = 730):
         """
         Загружает данные для пары инструментов и объединяет их
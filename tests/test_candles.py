@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Проверка загрузки свечей окнами (src/utils/candles.py) без обращения к API:
+разбиение периода на окна, склейка окон без дублей на границах, ограничитель
+частоты и обработка ошибок отдельных окон.
+Запуск: python -m pytest tests/test_candles.py или python tests/test_candles.py
+"""
+
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from tinkoff.invest import CandleInterval
+
+import src.utils.candles as candles
+from src.utils.candles import fetch_candles, merge_candles, split_windows
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class FakeMarketData:
+    """get_candles отдаёт дневные свечи окна включая обе границы; failures - сколько раз окно падает"""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_candles(self, figi, from_, to, interval):
+        with self._lock:
+            self.calls.append((from_, to))
+            if self.failures.get(from_, 0) > 0:
+                self.failures[from_] -= 1
+                raise RuntimeError("RESOURCE_EXHAUSTED")
+        days = (to - from_).days
+        return SimpleNamespace(candles=[
+            SimpleNamespace(time=from_ + timedelta(days=i), close=i) for i in range(days + 1)
+        ])
+
+class CountingLimiter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            self.count += 1
+
+def fake_client(failures=None):
+    return SimpleNamespace(market_data=FakeMarketData(failures))
+
+def test_split_windows():
+    windows = split_windows(START, START + timedelta(days=10), timedelta(days=4))
+    assert windows == [
+        (START, START + timedelta(days=4)),
+        (START + timedelta(days=4), START + timedelta(days=8)),
+        (START + timedelta(days=8), START + timedelta(days=10)),
+    ]
+    assert split_windows(START, START + timedelta(days=4), timedelta(days=4)) == [(START, START + timedelta(days=4))]
+    assert split_windows(START, START, timedelta(days=1)) == []
+
+def test_merge_candles_drops_boundary_duplicates():
+    first = [SimpleNamespace(time=START + timedelta(days=i)) for i in range(3)]
+    second = [SimpleNamespace(time=START + timedelta(days=i)) for i in range(2, 5)]
+    merged = merge_candles([second, first])
+    assert [c.time for c in merged] == [START + timedelta(days=i) for i in range(5)]
+
+def test_fetch_candles_windows_and_limiter():
+    client = fake_client()
+    limiter = CountingLimiter()
+    result = fetch_candles(client, "FIGI", START, START + timedelta(days=700),
+                           CandleInterval.CANDLE_INTERVAL_DAY, limiter=limiter)
+    assert len(client.market_data.calls) == 2
+    assert limiter.count == 2
+    # Свеча на границе окон одна, все дни по порядку
+    assert [c.time for c in result] == [START + timedelta(days=i) for i in range(701)]
+
+def test_fetch_candles_retries_and_keeps_other_windows():
+    retry_delay = candles.CANDLE_RETRY_DELAY
+    candles.CANDLE_RETRY_DELAY = 0
+    try:
+        second = START + timedelta(days=365)
+        # Первое окно падает один раз (повтор успешен), второе - всегда
+        client = fake_client({START: 1, second: candles.CANDLE_RETRIES + 1})
+        limiter = CountingLimiter()
+        result = fetch_candles(client, "FIGI", START, START + timedelta(days=700),
+                               CandleInterval.CANDLE_INTERVAL_DAY, limiter=limiter)
+        assert [c.time for c in result] == [START + timedelta(days=i) for i in range(366)]
+        assert limiter.count == 2 + 1 + candles.CANDLE_RETRIES
+
+        # Если не загрузилось ни одно окно - ошибка, а не пустой результат
+        client = fake_client({START: candles.CANDLE_RETRIES + 1})
+        try:
+            fetch_candles(client, "FIGI", START, START + timedelta(days=10),
+                          CandleInterval.CANDLE_INTERVAL_DAY, limiter=CountingLimiter())
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("ожидалась ошибка загрузки")
+    finally:
+        candles.CANDLE_RETRY_DELAY = retry_delay
+
+def test_unsupported_interval():
+    try:
+        fetch_candles(fake_client(), "FIGI", START, START + timedelta(days=1),
+                      CandleInterval.CANDLE_INTERVAL_2_MIN)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ожидался ValueError")
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
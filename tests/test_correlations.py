@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Проверка матрицы корреляций CorrelationCalculator: результат должен совпадать
+с DataFrame.corr() (по попарно общим дням при пропусках) в float64 и в float32.
+Запуск: python -m pytest tests/test_correlations.py или python tests/test_correlations.py
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data_feed.calculate_correlations import CorrelationCalculator, FLOAT32_MIN_COLUMNS
+
+# Допустимое расхождение с pandas: float64 - до ошибок округления, float32 - для отчёта до 3 знаков
+TOLERANCE_FLOAT64 = 1e-10
+TOLERANCE_FLOAT32 = 1e-4
+
+def make_prices(days: int, columns: int, gaps: bool, seed: int = 0) -> pd.DataFrame:
+    """Случайные цены с общим фактором (есть и сильные, и слабые корреляции)"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(size=(days, 1)).cumsum(axis=0)
+    values = 100 + market * rng.uniform(-2, 2, columns) + rng.normal(size=(days, columns)).cumsum(axis=0)
+    df = pd.DataFrame(values, columns=[f"T{i}" for i in range(columns)])
+    if gaps:
+        df = df.mask(rng.random((days, columns)) < 0.2)
+        df.iloc[:, 1] = np.nan                  # инструмент без цен
+        df.iloc[:, 2] = 50.0                    # цена не менялась
+        df.iloc[: days - 1, 3] = np.nan         # одна цена - корреляция не определена
+    return df
+
+def assert_matches_pandas(corr: np.ndarray, prices: pd.DataFrame, tolerance: float):
+    expected = prices.corr().to_numpy()
+    assert corr.shape == expected.shape
+    assert (np.isnan(corr) == np.isnan(expected)).all(), "NaN в разных ячейках"
+    assert np.nanmax(np.abs(corr - expected)) < tolerance
+
+def calculate(prices: pd.DataFrame) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculator = CorrelationCalculator()
+        return calculator.calculate_correlation_matrix(prices)
+
+def test_complete_kernel_float64():
+    prices = make_prices(300, 30, gaps=False)
+    corr = CorrelationCalculator._complete_correlation(prices.to_numpy(dtype=np.float64))
+    assert_matches_pandas(corr, prices, TOLERANCE_FLOAT64)
+
+def test_pairwise_kernel_float64():
+    prices = make_prices(300, 30, gaps=True)
+    corr = CorrelationCalculator._pairwise_correlation(prices.to_numpy(dtype=np.float64))
+    assert_matches_pandas(corr, prices, TOLERANCE_FLOAT64)
+
+def test_complete_kernel_float32():
+    prices = make_prices(300, 30, gaps=False, seed=1)
+    corr = CorrelationCalculator._complete_correlation(prices.to_numpy(dtype=np.float32))
+    assert_matches_pandas(corr, prices, TOLERANCE_FLOAT32)
+
+def test_pairwise_kernel_float32():
+    prices = make_prices(300, 30, gaps=True, seed=1)
+    corr = CorrelationCalculator._pairwise_correlation(prices.to_numpy(dtype=np.float32))
+    assert_matches_pandas(corr, prices, TOLERANCE_FLOAT32)
+
+def test_matrix_below_float32_threshold():
+    for gaps in (False, True):
+        prices = make_prices(250, FLOAT32_MIN_COLUMNS, gaps=gaps, seed=2)
+        assert_matches_pandas(calculate(prices).to_numpy(), prices, TOLERANCE_FLOAT64)
+
+def test_matrix_above_float32_threshold():
+    for gaps in (False, True):
+        prices = make_prices(250, FLOAT32_MIN_COLUMNS + 1, gaps=gaps, seed=3)
+        correlation_matrix = calculate(prices)
+        assert correlation_matrix.dtypes.eq(np.float64).all()
+        # Корреляция инструмента с собой ровно 1.0 (кроме инструментов без корреляции)
+        diagonal = np.diagonal(correlation_matrix.to_numpy())
+        assert (diagonal[~np.isnan(diagonal)] == 1.0).all()
+        assert_matches_pandas(correlation_matrix.to_numpy(), prices, TOLERANCE_FLOAT32)
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Проверка кодировки монолитного экспорта: итоговый файл всегда валидный UTF-8,
+в том числе для файлов не в UTF-8 (и мелких, и крупных, копируемых через sendfile).
+Запуск: python -m pytest tests/test_monolithic_export.py или python tests/test_monolithic_export.py
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from create_monolithic_export import MonolithicProjectExporter
+
+LATIN1_MARKER = "# Файл в кодировке latin-1"
+
+def export(files: dict) -> str:
+    """Экспортирует временный проект из {имя: байты} и возвращает текст экспорта (падает, если не UTF-8)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp) / "project"
+        project.mkdir()
+        for name, data in files.items():
+            (project / name).write_bytes(data)
+        output = Path(tmp) / "export.txt"
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = MonolithicProjectExporter(project).export_project(output)
+        assert result == output
+        return output.read_bytes().decode('utf-8')
+
+def test_small_non_utf8_file():
+    text = export({"small.txt": "Привет\n".encode('cp1251')})
+    assert LATIN1_MARKER in text
+
+def test_large_file_with_non_utf8_byte_after_head():
+    size = MonolithicProjectExporter.PREFETCH_MAX_SIZE + 400 * 1024
+    data = bytearray(b"a" * size)
+    # Не UTF-8 байт за пределами проверки на бинарность (первые 512 байт)
+    data[600] = 0xE9
+    text = export({"large.txt": bytes(data)})
+    assert LATIN1_MARKER in text
+    assert "é" in text
+
+def test_large_utf8_file_copied_as_is():
+    line = "Привет, мир\n"
+    data = (line * (MonolithicProjectExporter.PREFETCH_MAX_SIZE // len(line.encode()) + 1000)).encode('utf-8')
+    text = export({"large.txt": data})
+    assert LATIN1_MARKER not in text
+    assert data.decode('utf-8') in text
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")